@@ -0,0 +1,138 @@
+"""Microbenchmarks for django-class-settings.
+
+Benchmarks are functions named ``bench_*`` in the ``bench_*`` modules of this
+package. Each gets passed a ``benchmark(name, func, memory=False, shared=None)``
+callable that times func and records the result under name. If memory is true,
+the size of the containers returned by func that aren't part of shared, the
+memory a call allocated and still holds, and the peak memory allocated by a call
+are recorded too.
+
+Run them with ``python -m benchmarks [pattern ...]``, optionally saving the
+results as JSON with ``--save`` or comparing them against saved results with
+``--compare``.
+"""
+
+import fnmatch
+import gc
+import importlib
+import json
+import pathlib
+import platform
+import sys
+import timeit
+import tracemalloc
+
+
+def time_call(func, *, repeat=5):
+    """Return the best time in seconds that a call to func took."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def walk_containers(value):
+    """Yield the dicts, lists, tuples, and sets reachable from value once."""
+    seen = set()
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if type(value) not in {dict, list, tuple, set, frozenset}:
+            continue
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        yield value
+        stack.extend(value.values() if type(value) is dict else value)
+
+
+def measure_memory(func, *, shared=None):
+    """Return the size in bytes of the containers in the result of a call to func
+    that aren't part of shared, the memory allocated during the call that's
+    still held once garbage is collected, and the peak memory allocated during
+    the call.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        peak = tracemalloc.get_traced_memory()[1]
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    shared_ids = set(map(id, walk_containers(shared)))
+    size = sum(
+        sys.getsizeof(container)
+        for container in walk_containers(result)
+        if id(container) not in shared_ids
+    )
+    return size, retained, peak
+
+
+def collect(patterns=()):
+    for path in sorted(pathlib.Path(__file__).parent.glob("bench_*.py")):
+        module = importlib.import_module("{}.{}".format(__name__, path.stem))
+        for name, func in vars(module).items():
+            if not name.startswith("bench_") or not callable(func):
+                continue
+            full_name = "{}.{}".format(
+                path.stem[len("bench_") :], name[len("bench_") :]
+            )
+            if patterns and not any(fnmatch.fnmatch(full_name, p) for p in patterns):
+                continue
+            yield full_name, func
+
+
+def run(patterns=(), *, report=print):
+    results = {}
+    for bench_name, func in collect(patterns):
+
+        def benchmark(name, func, *, memory=False, shared=None, bench_name=bench_name):
+            name = "{}: {}".format(bench_name, name)
+            results[name] = time_call(func)
+            report("{:<70} {:>12.3f} us".format(name, results[name] * 1e6))
+            if memory:
+                sizes = measure_memory(func, shared=shared)
+                for label, size in zip(
+                    ["memory", "retained memory", "peak memory"], sizes
+                ):
+                    memory_name = "{} ({})".format(name, label)
+                    results[memory_name] = size
+                    report("{:<70} {:>12.1f} KiB".format(memory_name, size / 1024))
+
+        func(benchmark)
+    return results
+
+
+def save(results, path):
+    data = {"python": platform.python_version(), "results": results}
+    with open(path, "w") as file:
+        json.dump(data, file, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as file:
+        return json.load(file)["results"]
+
+
+def compare(results, baseline, *, threshold=0.1, report=print):
+    """Report how results changed from baseline and return the regressions.
+
+    A result regressed if it grew by more than threshold, a fraction of its
+    baseline.
+    """
+    regressions = []
+    for name, value in results.items():
+        base_value = baseline.get(name)
+        if not base_value:
+            continue
+        change = value / base_value - 1
+        if change > threshold:
+            regressions.append(name)
+            label = "regressed"
+        elif change < -threshold:
+            label = "improved"
+        else:
+            label = ""
+        report("{:<70} {:>+8.1%} {}".format(name, change, label).rstrip())
+    return regressions
@@ -0,0 +1,26 @@
+import argparse
+import sys
+
+from . import compare, load, run, save
+
+parser = argparse.ArgumentParser(prog="python -m benchmarks")
+parser.add_argument("patterns", nargs="*", help="glob patterns to select benchmarks")
+parser.add_argument("--save", metavar="PATH", help="save the results as JSON")
+parser.add_argument(
+    "--compare", metavar="PATH", help="compare the results against saved ones"
+)
+parser.add_argument(
+    "--threshold",
+    type=float,
+    default=0.1,
+    help="fraction a result has to grow by to count as a regression",
+)
+args = parser.parse_args()
+results = run(args.patterns)
+if args.save:
+    save(results, args.save)
+if args.compare:
+    print()
+    regressions = compare(results, load(args.compare), threshold=args.threshold)
+    if regressions:
+        sys.exit("{} benchmarks regressed".format(len(regressions)))
@@ -0,0 +1,116 @@
+import os
+import sys
+import tempfile
+
+import class_settings
+from class_settings import frozen
+from class_settings.importers import SettingsImporter
+
+environ = {
+    "DJANGO_SECRET_KEY": "bench",
+    "DJANGO_ALLOWED_HOSTS": "localhost, example.com",
+}
+modules = [
+    "benchmarks.settings_plain",
+    "benchmarks.settings_class",
+    "benchmarks.settings_class:BenchSettings",
+]
+
+
+def reset():
+    """Undo the settings setup, as if a new process was started."""
+    from django.conf import settings
+    from django.utils.functional import empty
+
+    settings.__dict__.clear()
+    settings._wrapped = empty
+    for module in modules:
+        sys.modules.pop(module, None)
+    while SettingsImporter in sys.meta_path:
+        sys.meta_path.remove(SettingsImporter)
+    class_settings._setup = False
+    os.environ.pop("DJANGO_SETTINGS_FROZEN", None)
+
+
+def setup_plain():
+    reset()
+    os.environ["DJANGO_SETTINGS_MODULE"] = "benchmarks.settings_plain"
+    from django.conf import settings
+
+    return settings
+
+
+def setup_class():
+    reset()
+    os.environ["DJANGO_SETTINGS_MODULE"] = "benchmarks.settings_class"
+    os.environ["DJANGO_SETTINGS_CLASS"] = "BenchSettings"
+    class_settings.setup()
+    from django.conf import settings
+
+    return settings
+
+
+def bench_setup(benchmark):
+    old_environ = dict(os.environ)
+    os.environ.update(environ)
+    temp_dir = tempfile.TemporaryDirectory()
+    try:
+        reset()
+        frozen_path = os.path.join(temp_dir.name, "settings.frozen")
+        frozen.freeze("benchmarks.settings_class:BenchSettings", frozen_path)
+
+        def setup_frozen():
+            settings = setup_class()
+            os.environ["DJANGO_SETTINGS_FROZEN"] = frozen_path
+            return settings
+
+        for name, setup in [
+            ("plain", setup_plain),
+            ("class", setup_class),
+            ("frozen", setup_frozen),
+        ]:
+            benchmark("{}, setup and first read".format(name), lambda: setup().DEBUG)
+
+            settings = setup()
+            settings.DEBUG
+
+            def first_read(settings=settings):
+                settings.__dict__.pop("ALLOWED_HOSTS", None)
+                return settings.ALLOWED_HOSTS
+
+            benchmark("{}, first read".format(name), first_read)
+            benchmark("{}, repeated read".format(name), lambda: settings.DEBUG)
+    finally:
+        reset()
+        temp_dir.cleanup()
+        os.environ.clear()
+        os.environ.update(old_environ)
+
+
+def bench_overlay(benchmark):
+    from django.test.utils import override_settings
+
+    old_environ = dict(os.environ)
+    os.environ.update(environ)
+    try:
+        settings = setup_class()
+        settings.DEBUG
+
+        def overridden():
+            with override_settings(DEBUG=True, TIME_ZONE="Europe/Paris"):
+                return settings.DEBUG, settings.TIME_ZONE
+
+        def overlaid():
+            with class_settings.overlay(DEBUG=True, TIME_ZONE="Europe/Paris"):
+                return settings.DEBUG, settings.TIME_ZONE
+
+        benchmark("override_settings, request", overridden)
+        benchmark("overlay, request", overlaid)
+        benchmark("no overlay, read", lambda: settings.SECRET_KEY)
+        benchmark("no overlay, overlaid read", lambda: settings.DEBUG)
+        with class_settings.overlay(DEBUG=True):
+            benchmark("overlay, overlaid read", lambda: settings.DEBUG)
+    finally:
+        reset()
+        os.environ.clear()
+        os.environ.update(old_environ)
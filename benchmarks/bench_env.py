@@ -0,0 +1,141 @@
+import os
+import sys
+import tempfile
+
+from class_settings import Env, Settings, env, envfiles, files, profiling
+from class_settings.env import get_namespace
+from class_settings.settings import SettingsDict
+
+
+def frame_walk(frame):
+    # How env() used to find the namespace before it was tracked
+    while frame is not None:
+        f_locals = frame.f_locals
+        if isinstance(f_locals, SettingsDict):
+            return f_locals
+        frame = frame.f_back
+    return None
+
+
+def call_at_depth(depth, func):
+    if depth:
+        return call_at_depth(depth - 1, func)
+    return func()
+
+
+def bench_namespace_lookup(benchmark):
+    for depth in [0, 100]:
+        for name, lookup in [("frame walk", frame_walk), ("context", get_namespace)]:
+
+            def func(lookup=lookup, depth=depth):
+                return call_at_depth(depth, lambda: lookup(sys._getframe()))
+
+            class BenchSettings(Settings):
+                benchmark("{}, inside, depth {}".format(name, depth), func)
+
+            benchmark("{}, outside, depth {}".format(name, depth), func)
+
+
+def bench_lookup(benchmark):
+    os.environ["DJANGO_BENCH"] = "bench"
+    for depth in [0, 100]:
+
+        def func(depth=depth):
+            return call_at_depth(depth, lambda: env("BENCH", prefix="DJANGO_"))
+
+        class BenchSettings(Settings):
+            benchmark("inside, depth {}".format(depth), func)
+
+        benchmark("outside, depth {}".format(depth), func)
+
+
+def bench_profiling(benchmark):
+    os.environ["DJANGO_BENCH"] = "1"
+    for enabled in [False, True]:
+        profiling.profile(enabled)
+        try:
+            state = "enabled" if enabled else "disabled"
+            benchmark("{}, env".format(state), lambda: env("DJANGO_BENCH"))
+            benchmark("{}, env.int".format(state), lambda: env.int("DJANGO_BENCH"))
+        finally:
+            profiling.profile(False)
+            profiling.reset()
+
+
+def write_env_file(directory, size):
+    path = os.path.join(directory, "{}.env".format(size))
+    with open(path, "w") as file:
+        for i in range(size):
+            if i % 3 == 0:
+                file.write("# Setting {}\n".format(i))
+            if i % 2:
+                file.write('export BENCH_{}="value\\n{}" # comment\n'.format(i, i))
+            else:
+                file.write("BENCH_{}=value-{}\n".format(i, i))
+    return path
+
+
+def bench_read_env(benchmark):
+    try:
+        import dotenv
+    except ImportError:
+        dotenv = None
+    with tempfile.TemporaryDirectory() as directory:
+        for size in [1000, 10000]:
+            path = write_env_file(directory, size)
+            benchmark("load, {} entries".format(size), lambda: envfiles.load(path))
+            benchmark(
+                "read_env, {} entries".format(size),
+                lambda: Env(source={}).read_env(path),
+            )
+            if dotenv is not None:
+                benchmark(
+                    "python-dotenv, {} entries".format(size),
+                    lambda: dotenv.dotenv_values(path),
+                )
+
+
+def compile_settings(value, count):
+    """Compile a Settings class body assigning value, formatted with the index,
+    to count settings.
+    """
+    lines = ["class BenchSettings(Settings):"]
+    lines += ["    SECRET{0} = {1}".format(i, value.format(i)) for i in range(count)]
+    return compile("\n".join(lines), "<bench_files>", "exec")
+
+
+def bench_files(benchmark):
+    names = ["BENCH_SECRET{}_FILE".format(i) for i in range(20)]
+    environ = {name: os.environ.get(name) for name in names}
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for i, name in enumerate(names):
+                path = os.path.join(directory, "secret{}".format(i))
+                with open(path, "w") as file:
+                    file.write("secret\n")
+                os.environ[name] = path
+
+            def sequential():
+                return [env("BENCH_SECRET{}".format(i)) for i in range(20)]
+
+            # Only lookups assigned straight to a setting are batched
+            batched_code = compile_settings(
+                'env.file("BENCH_SECRET{}_FILE", prefix=None)', 20
+            )
+            unbatched_code = compile_settings(
+                'files.read(os.environ["BENCH_SECRET{}_FILE"])', 20
+            )
+            namespace = {"Settings": Settings, "env": env, "files": files, "os": os}
+
+            benchmark("sequential, 20 files", sequential)
+            benchmark(
+                "unbatched, 20 files", lambda: exec(unbatched_code, dict(namespace))
+            )
+            benchmark("batched, 20 files", lambda: exec(batched_code, dict(namespace)))
+    finally:
+        # Don't leave the paths to the deleted files to later benchmarks
+        for name, value in environ.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
@@ -0,0 +1,127 @@
+import builtins
+import functools
+import inspect
+
+from class_settings import parsers
+
+
+def legacy_get_parser(parser):
+    is_builtin = parser in vars(builtins).values()
+    is_class = inspect.isclass(parser)
+    if is_builtin and is_class and parser.__name__ in vars(parsers):
+        parser = vars(parsers)[parser.__name__]
+    return parser
+
+
+def legacy_sequence_parser(type):
+    @functools.wraps(type)
+    def parser(value, separator=",", subparser=None):
+        items = map(builtins.str.strip, value.split(separator))
+        if subparser is not None:
+            subparser = legacy_get_parser(subparser)
+            items = map(subparser, items)
+        return type(items)
+
+    return parser
+
+
+def legacy_dict(
+    value, separator=",", itemseparator="=", keyparser=None, valueparser=None
+):
+    items = map(builtins.str.strip, value.split(separator))
+    keys, values = zip(
+        *(map(builtins.str.strip, item.split(itemseparator)) for item in items)
+    )
+    if keyparser is not None:
+        keyparser = legacy_get_parser(keyparser)
+        keys = map(keyparser, keys)
+    if valueparser is not None:
+        valueparser = legacy_get_parser(valueparser)
+        values = map(valueparser, values)
+    return builtins.dict(zip(keys, values))
+
+
+def legacy_bool(value):
+    if value.lower() in ["true", "t", "yes", "y", "on", "1"]:
+        return True
+    elif value.lower() in ["false", "f", "no", "n", "off", "0"]:
+        return False
+    else:
+        raise ValueError("Could not convert {!r} to bool".format(value))
+
+
+legacy_parsers = {
+    "list": legacy_sequence_parser(list),
+    "tuple": legacy_sequence_parser(tuple),
+    "set": legacy_sequence_parser(set),
+    "frozenset": legacy_sequence_parser(frozenset),
+    "dict": legacy_dict,
+    "bool": legacy_bool,
+}
+
+cases = [
+    ("int", "42", {}),
+    ("float", "4.2", {}),
+    ("complex", "4+2j", {}),
+    ("str", "42", {}),
+    ("bytes", "42", {"encoding": "ascii"}),
+    ("bytearray", "42", {"encoding": "ascii"}),
+    ("list", "a, b, c", {}),
+    ("list", "1, 2, 3", {"subparser": int}),
+    ("list", "1, 0, 1", {"subparser": bool}),
+    ("tuple", "1, 2, 3", {"subparser": int}),
+    ("set", "1, 2, 3", {"subparser": int}),
+    ("frozenset", "1, 2, 3", {"subparser": int}),
+    ("dict", "a = 1, b = 2", {}),
+    ("dict", "a = 1, b = 2", {"keyparser": str, "valueparser": float}),
+    ("bool", "off", {}),
+    ("json", '{"a": [1, 2]}', {}),
+]
+
+
+def describe(name, kwargs):
+    arguments = ", ".join(
+        "{}={}".format(key, getattr(value, "__name__", value))
+        for key, value in kwargs.items()
+    )
+    return "{}({})".format(name, arguments)
+
+
+def bench_builtin(benchmark):
+    for name, value, kwargs in cases:
+        parser = getattr(parsers, name)
+        benchmark(describe(name, kwargs), lambda: parser(value, **kwargs))
+        if name in legacy_parsers:
+            legacy_parser = legacy_parsers[name]
+            benchmark(
+                "{} (legacy)".format(describe(name, kwargs)),
+                lambda: legacy_parser(value, **kwargs),
+            )
+
+
+def bench_large(benchmark):
+    hosts = ", ".join("host{}.example.com".format(i) for i in range(10000))
+    quoted_hosts = ", ".join('"host{}.example.com"'.format(i) for i in range(10000))
+    numbers = ",".join(map(str, range(10000)))
+    pairs = ", ".join("key{0} = {0}".format(i) for i in range(10000))
+    quoted_pairs = ", ".join('"key{0}" = "{0}"'.format(i) for i in range(10000))
+    cases = [
+        ("list", hosts, {}),
+        ("list", quoted_hosts, {"quoted": True}),
+        ("set", numbers, {"subparser": int}),
+        ("dict", pairs, {}),
+        ("dict", pairs, {"valueparser": int}),
+        ("dict", quoted_pairs, {"quoted": True}),
+    ]
+    for name, value, kwargs in cases:
+        parser = getattr(parsers, name)
+        benchmark(
+            "{} x 10000".format(describe(name, kwargs)),
+            lambda: parser(value, **kwargs),
+        )
+        if name in legacy_parsers and "quoted" not in kwargs:
+            legacy_parser = legacy_parsers[name]
+            benchmark(
+                "{} x 10000 (legacy)".format(describe(name, kwargs)),
+                lambda: legacy_parser(value, **kwargs),
+            )
@@ -0,0 +1,243 @@
+import copy
+import os
+import types
+
+from class_settings import Settings, cow, env
+from class_settings.importers import SettingsModule
+
+
+class LegacySettingsModule(types.ModuleType):
+    # How settings were served before the namespace was flattened
+    def __init__(self, name, settings):
+        super().__init__(name, settings.__doc__)
+        self.SETTINGS_MODULE = name
+        self.SETTINGS_CLASS = settings
+
+    def __getattr__(self, name):
+        return getattr(self.SETTINGS_CLASS, name)
+
+
+class BaseBenchSettings(Settings):
+    DEBUG = False
+    ALLOWED_HOSTS = ["localhost"]
+
+
+class BenchSettings(BaseBenchSettings):
+    DEBUG = True
+
+
+names = ["DEBUG", "ALLOWED_HOSTS", "USE_TZ", "INSTALLED_APPS", "TIME_ZONE"]
+
+
+def bench_first_access(benchmark):
+    for name, module_type in [
+        ("legacy", LegacySettingsModule),
+        ("flattened", SettingsModule),
+    ]:
+        for cold in [True, False]:
+
+            def func(module_type=module_type, cold=cold):
+                if cold:
+                    # Time flattening the class too, as happens once per process
+                    BenchSettings._clear_caches()
+                module = module_type("settings:BenchSettings", BenchSettings())
+                for setting in names:
+                    getattr(module, setting)
+
+            benchmark(
+                "{}, {}, {} settings".format(
+                    name, "cold" if cold else "warm", len(names)
+                ),
+                func,
+            )
+
+
+def bench_repeated_access(benchmark):
+    for name, module_type in [
+        ("legacy", LegacySettingsModule),
+        ("flattened", SettingsModule),
+    ]:
+        module = module_type("settings:BenchSettings", BenchSettings())
+        for setting in ["DEBUG", "ALLOWED_HOSTS", "USE_TZ"]:
+            benchmark(
+                "{}, {}".format(name, setting),
+                lambda module=module, setting=setting: getattr(module, setting),
+            )
+
+
+def legacy_dir(settings):
+    # How dir() was computed before it was cached per class
+    default_settings = settings._options.default_settings
+    default_dir = [s for s in dir(default_settings) if s.isupper()]
+    return {*object.__dir__(settings), *default_dir}
+
+
+def bench_dir(benchmark):
+    settings = BenchSettings()
+    benchmark("legacy", lambda: legacy_dir(settings))
+    benchmark("cached", lambda: dir(settings))
+    module = SettingsModule("settings:BenchSettings", settings)
+    benchmark("module", lambda: dir(module))
+
+
+def bench_items(benchmark):
+    settings = BenchSettings()
+    benchmark(
+        "dir and getattr",
+        lambda: [(name, getattr(settings, name)) for name in dir(settings)],
+    )
+    benchmark("items", lambda: list(settings.items()))
+
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "filters": {
+        "require_debug_false": {"()": "django.utils.log.RequireDebugFalse"},
+        "require_debug_true": {"()": "django.utils.log.RequireDebugTrue"},
+    },
+    "formatters": {
+        name: {
+            "format": "[{asctime}] {levelname} {name} {message}",
+            "style": "{",
+            "datefmt": "%Y-%m-%d %H:%M:%S",
+        }
+        for name in ["verbose", "simple", "json", "django.server"]
+    },
+    "handlers": {
+        name: {
+            "level": "INFO",
+            "filters": ["require_debug_true"],
+            "class": "logging.StreamHandler",
+            "formatter": "verbose",
+        }
+        for name in ["console", "file", "mail_admins", "django.server", "sentry"]
+    },
+    "loggers": {
+        name: {"handlers": ["console", "mail_admins"], "level": "INFO"}
+        for name in [
+            "django",
+            "django.request",
+            "django.server",
+            "django.db.backends",
+            "django.security",
+            *("app{}".format(i) for i in range(20)),
+        ]
+    },
+}
+
+
+def extend_logging(inject):
+    logging = inject(LOGGING)
+    logging["handlers"]["console"]["level"] = "DEBUG"
+    logging["loggers"]["app0"]["level"] = "DEBUG"
+    logging["loggers"]["app1"] = {"handlers": ["console"]}
+    return cow.resolve(logging)
+
+
+class BaseLoggingSettings(Settings):
+    LOGGING = LOGGING
+
+
+def extend_logging_class():
+    class LoggingSettings(BaseLoggingSettings):
+        LOGGING = LOGGING
+        LOGGING["handlers"]["console"]["level"] = "DEBUG"
+        LOGGING["loggers"]["app0"]["level"] = "DEBUG"
+        LOGGING["loggers"]["app1"] = {"handlers": ["console"]}
+
+        class Meta:
+            inject_settings = True
+
+    return LoggingSettings.LOGGING
+
+
+def bench_inject(benchmark):
+    for name, inject in [("deepcopy", copy.deepcopy), ("copy on write", cow.inject)]:
+        benchmark(
+            "{}, LOGGING".format(name),
+            lambda inject=inject: extend_logging(inject),
+            memory=True,
+            shared=LOGGING,
+        )
+    benchmark("class body, LOGGING", extend_logging_class, memory=True, shared=LOGGING)
+
+
+def settings_source(count, *, meta):
+    lines = ["class BenchSettings(Settings):"]
+    lines += ["    SETTING_{0} = {0}".format(i) for i in range(count)]
+    if meta:
+        lines += ["    class Meta:", "        env_prefix = 'BENCH_'"]
+    return "\n".join(lines)
+
+
+def bench_create(benchmark):
+    for count in [10, 100, 1000]:
+        for meta in [False, True]:
+            code = compile(settings_source(count, meta=meta), "<bench>", "exec")
+            benchmark(
+                "{} settings{}".format(count, ", Meta" if meta else ""),
+                lambda code=code: exec(code, {"Settings": Settings}),
+            )
+
+
+def bench_factory(benchmark):
+    for count in [10, 100]:
+        attrs = {"SETTING_{}".format(i): i for i in range(count)}
+        code = compile(settings_source(count, meta=False), "<bench>", "exec")
+        benchmark(
+            "{} settings, class statement".format(count),
+            lambda code=code: exec(code, {"Settings": Settings}),
+        )
+        benchmark(
+            "{} settings, create".format(count),
+            lambda attrs=attrs: Settings.create("BenchSettings", attrs),
+        )
+
+
+def bench_inheritance(benchmark):
+    for depth in [1, 10, 50]:
+        leaf = BenchSettings
+        for i in range(depth):
+
+            class leaf(leaf):
+                locals()["SETTING_{}".format(i)] = i
+
+        def create(leaf=leaf):
+            class DeepSettings(leaf):
+                DEBUG = False
+
+            return DeepSettings
+
+        benchmark("depth {}, create".format(depth), create)
+        settings = leaf()
+        benchmark("depth {}, default setting".format(depth), lambda: settings.USE_TZ)
+        benchmark(
+            "depth {}, flatten".format(depth),
+            lambda: (leaf._clear_caches(), leaf._get_settings()),
+        )
+
+
+def tenant_source(count):
+    lines = []
+    for i in range(count):
+        lines += [
+            "class Tenant{}Settings(Settings):".format(i),
+            "    ALLOWED_HOSTS = env.list('TENANT_HOSTS', prefix=None)",
+            "    CACHES = {'default': {'LOCATION': env('TENANT_CACHE', prefix=None)}}",
+        ]
+    return "\n".join(lines)
+
+
+def bench_tenants(benchmark):
+    os.environ.update(
+        TENANT_HOSTS="www.example.com, example.com", TENANT_CACHE="cache:6379"
+    )
+    code = compile(tenant_source(100), "<bench>", "exec")
+
+    def create():
+        namespace = {"Settings": Settings, "env": env}
+        exec(code, namespace)
+        return namespace
+
+    benchmark("100 classes", create, memory=True)
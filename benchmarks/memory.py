@@ -0,0 +1,137 @@
+"""Memory of forked workers sharing the settings loaded by their parent.
+
+A settings class with many settings is generated and loaded in a parent
+process, like gunicorn's master with --preload, which then forks workers that
+read every setting and collect garbage. The RSS and USS, the memory unique to a
+process, of each worker are reported with and without ``class_settings.freeze``.
+
+Run it with ``python -m benchmarks.memory``. It's Linux only, as the sizes are
+read from /proc.
+"""
+
+import argparse
+import collections.abc
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+MODES = ["plain", "frozen"]
+
+
+def get_memory(pid="self"):
+    """Return the RSS and USS in bytes of the process pid."""
+    sizes = {}
+    with open("/proc/{}/smaps_rollup".format(pid)) as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if value.endswith(" kB\n"):
+                sizes[key] = int(value.split()[0]) * 1024
+    return sizes["Rss"], sizes["Private_Clean"] + sizes["Private_Dirty"]
+
+
+def generate_settings(path, size):
+    """Write a settings module with size settings of each kind to path."""
+    lines = [
+        "from class_settings import Settings, env",
+        "",
+        "",
+        "class MemorySettings(Settings):",
+        '    SECRET_KEY = env("SECRET_KEY", default="memory")',
+    ]
+    for i in range(size):
+        lines += [
+            '    LIST_{0} = ["item-{0}-a", "item-{0}-b", "item-{0}-c"]'.format(i),
+            '    DICT_{0} = {{"key": "value-{0}", "items": [{0}, "{0}"]}}'.format(i),
+            '    ENV_{0} = env.list("ENV_{0}", default=["{0}"])'.format(i),
+        ]
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def touch(value):
+    """Read value and the containers in it, as requests would."""
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, collections.abc.Mapping):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            stack.extend(value)
+
+
+def run_workers(mode, workers):
+    """Load the settings, fork workers reading them, and return the RSS and USS
+    of the parent and of each worker.
+    """
+    import class_settings
+
+    class_settings.setup()
+    from django.conf import settings
+
+    names = [name for name in dir(settings) if name.isupper()]
+    for name in names:
+        getattr(settings, name)
+    if mode == "frozen":
+        class_settings.freeze()
+    results = {"parent": get_memory(), "workers": []}
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:  # The worker
+            os.close(read_fd)
+            for name in names:
+                touch(getattr(settings, name))
+            gc.collect()
+            os.write(write_fd, json.dumps(get_memory()).encode())
+            os._exit(0)
+        os.close(write_fd)
+        with os.fdopen(read_fd) as f:
+            results["workers"].append(json.loads(f.read()))
+        os.waitpid(pid, 0)
+    return results
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        generate_settings(os.path.join(temp_dir, "memory_settings.py"), args.size)
+        environ = dict(
+            os.environ,
+            PYTHONPATH=os.pathsep.join([temp_dir, *sys.path]),
+            DJANGO_SETTINGS_MODULE="memory_settings",
+            DJANGO_SETTINGS_CLASS="MemorySettings",
+        )
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, "-m", __spec__.name, "--workers", str(args.workers)]
+                + ["--mode", mode],
+                env=environ,
+                stdout=subprocess.PIPE,
+                check=True,
+            ).stdout
+            results = json.loads(output.decode())
+            rss, uss = results["parent"]
+            print("{:<7} parent   RSS {:8.1f} MiB".format(mode, rss / 2**20))
+            for i, (rss, uss) in enumerate(results["workers"]):
+                print(
+                    "{:<7} worker {} RSS {:8.1f} MiB  USS {:8.1f} MiB".format(
+                        mode, i, rss / 2**20, uss / 2**20
+                    )
+                )
+
+
+parser = argparse.ArgumentParser(prog="python -m benchmarks.memory")
+parser.add_argument("--workers", type=int, default=4, help="workers to fork")
+parser.add_argument(
+    "--size", type=int, default=2000, help="settings to generate of each kind"
+)
+parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    if args.mode:
+        print(json.dumps(run_workers(args.mode, args.workers)))
+    else:
+        main(args)
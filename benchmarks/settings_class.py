@@ -0,0 +1,23 @@
+from class_settings import Settings, env
+
+
+class BenchSettings(Settings):
+    SECRET_KEY = env()
+    DEBUG = env.bool(default=False)
+    ALLOWED_HOSTS = env.list()
+    INSTALLED_APPS = [
+        "django.contrib.admin",
+        "django.contrib.auth",
+        "django.contrib.contenttypes",
+        "django.contrib.sessions",
+        "django.contrib.messages",
+        "django.contrib.staticfiles",
+    ]
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": env("DATABASE_NAME", default="db.sqlite3"),
+        }
+    }
+    TIME_ZONE = "UTC"
+    USE_TZ = True
@@ -1,15 +1,43 @@
-__all__ = ["Env", "Settings", "env", "setup"]
+__all__ = ["Env", "Settings", "env", "freeze", "overlay", "profile", "setup"]
 __version__ = "0.3.0-dev"
 
+import importlib
+import sys
+
 from .env import Env, env
-from .settings import Settings
+from .profiling import profile
+
+# Exports only imported on first access
+_lazy_exports = {"Settings": "settings", "freeze": "prefork", "overlay": "overlays"}
+
+
+def __getattr__(name):
+    try:
+        module_name = _lazy_exports[name]
+    except KeyError:
+        raise AttributeError(
+            "module {!r} has no attribute {!r}".format(__name__, name)
+        ) from None
+    value = getattr(importlib.import_module("." + module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_lazy_exports})
+
+
+if sys.version_info < (3, 7):  # Modules can't define __getattr__
+    from .overlays import overlay
+    from .prefork import freeze
+    from .settings import Settings
 
 
 def setup():
-    import sys
     from django.conf import settings
     from django.utils.functional import SimpleLazyObject
     from .importers import SettingsImporter, LazySettingsModule
+    from .overlays import install
 
     global _setup
     if _setup:
@@ -19,6 +47,7 @@ def setup():
     default_settings = LazySettingsModule()
     settings_module = SimpleLazyObject(lambda: default_settings.SETTINGS_MODULE)
     settings.configure(default_settings, SETTINGS_MODULE=settings_module)
+    install(settings)
 
     _setup = True
 
@@ -0,0 +1,31 @@
+import argparse
+
+from . import frozen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m class_settings")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    freeze_parser = subparsers.add_parser(
+        "freeze", help="evaluate a Settings class and save the results"
+    )
+    freeze_parser.add_argument("settings", help="the Settings class as module:class")
+    freeze_parser.add_argument(
+        "-o",
+        "--output",
+        help="where to save the results, defaults to <module>.<class>.frozen",
+    )
+
+    args = parser.parse_args(argv)
+    if ":" not in args.settings:
+        parser.error("settings has to be formatted as module:class")
+    output = args.output
+    if output is None:
+        output = "{}.frozen".format(args.settings.replace(":", "."))
+    frozen.freeze(args.settings, output)
+
+
+if __name__ == "__main__":
+    main()
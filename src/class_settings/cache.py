@@ -0,0 +1,85 @@
+import collections
+import copy
+import operator
+import threading
+
+from .utils import missing
+
+CacheInfo = collections.namedtuple(
+    "CacheInfo", ["hits", "misses", "maxsize", "currsize"]
+)
+
+_immutable_types = {
+    bool,
+    bytes,
+    complex,
+    float,
+    frozenset,
+    int,
+    range,
+    str,
+    type(None),
+}
+
+
+def copy_value(value):
+    """Return a copy of value that's safe to hand out, sharing immutables."""
+    value_type = type(value)
+    if value_type in _immutable_types:
+        return value
+    if value_type is tuple:
+        items = tuple(map(copy_value, value))
+        return value if all(map(operator.is_, items, value)) else items
+    if value_type is list:
+        return list(map(copy_value, value))
+    if value_type is dict:
+        return {key: copy_value(item) for key, item in value.items()}
+    if value_type is set:
+        return set(value)
+    if value_type is bytearray:
+        return bytearray(value)
+    return copy.deepcopy(value)
+
+
+class ParserCache:
+    """A bounded LRU cache of parsed env values.
+
+    Values are copied on the way in and out so callers can't mutate each
+    other's values.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self._misses += 1
+                return missing
+            self._data.move_to_end(key)
+            self._hits += 1
+        return copy_value(value)
+
+    def set(self, key, value):
+        value = copy_value(value)
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if self.maxsize is not None and len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.maxsize, len(self._data))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._hits = 0
+            self._misses = 0
@@ -0,0 +1,262 @@
+import collections.abc
+import copy
+import functools
+import operator
+
+from .utils import missing
+
+
+def inject(value):
+    """Return a copy of an inherited setting for use in a class body.
+
+    Dicts and lists are wrapped in copy-on-write views instead of being copied
+    upfront, everything else is deep copied.
+    """
+    proxy = wrap(value)
+    if proxy is value:
+        return copy.deepcopy(value)
+    return proxy
+
+
+def wrap(value, parent=None):
+    """Return a copy-on-write view of value if it's a dict or a list."""
+    value_type = type(value)
+    if value_type is dict:
+        proxy = DictProxy(value)
+    elif value_type is list:
+        proxy = ListProxy(value)
+    else:
+        return value
+    proxy._original = value
+    proxy._parent = parent
+    proxy._dirty = False
+    return proxy
+
+
+def resolve(value, memo=None):
+    """Replace the copy-on-write views in value with plain containers.
+
+    Views and containers reached more than once, such as a nested dict also
+    assigned to another setting, resolve to the same object when resolved with
+    the same memo dict.
+    """
+    value_type = type(value)
+    if not isinstance(value, (CopyOnWrite, list, tuple, dict)):
+        return value
+    if memo is None:
+        memo = {}
+    try:
+        return memo[id(value)][1]
+    except KeyError:
+        pass
+    if isinstance(value, CopyOnWrite):
+        result = value.resolve(memo)
+    elif value_type is list or value_type is tuple:
+        items = [resolve(item, memo) for item in value]
+        changed = not all(map(operator.is_, items, value))
+        result = value_type(items) if changed else value
+    elif value_type is dict:
+        items = {key: resolve(item, memo) for key, item in value.items()}
+        changed = not all(map(operator.is_, items.values(), value.values()))
+        result = items if changed else value
+    elif isinstance(value, dict):
+        # Subclasses such as OrderedDict can't be rebuilt, resolve in place
+        for key, item in value.items():
+            resolved = resolve(item, memo)
+            if resolved is not item:
+                value[key] = resolved
+        result = value
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            resolved = resolve(item, memo)
+            if resolved is not item:
+                value[index] = resolved
+        result = value
+    else:
+        result = value  # A tuple subclass, like a namedtuple
+    memo[id(value)] = (value, result)  # Keeps value alive to keep its id
+    return result
+
+
+def mutator(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._set_dirty()
+        return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+class CopyOnWrite:
+    """A copy of a container shared with a base class.
+
+    Only the containers read through the view are copied, shallowly, and they
+    resolve to the base class's container as long as neither they nor the
+    containers read through them are mutated.
+    """
+
+    __slots__ = ()
+
+    def _get_child(self, key, value):
+        if isinstance(value, CopyOnWrite):
+            return value
+        child = wrap(value, self)
+        if child is value:
+            child = copy.deepcopy(value)
+            if child is value:
+                return value  # Immutable
+            self._set_dirty()  # The copy may be mutated
+        self._store(key, child)
+        return child
+
+    def _set_dirty(self):
+        proxy = self
+        while proxy is not None and not proxy._dirty:
+            proxy._dirty = True
+            proxy = proxy._parent
+
+    def resolve(self, memo=None):
+        """Return the container this view stands for."""
+        if not self._dirty:
+            return self._original
+        return self._resolve(memo if memo is not None else {})
+
+    def copy(self):
+        return copy.deepcopy(self.resolve())
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(self.resolve(), memo)
+
+    def __reduce__(self):
+        value = self.resolve()
+        return type(value), (value,)
+
+
+class DictProxy(CopyOnWrite, dict):
+    __slots__ = ("_original", "_parent", "_dirty")
+
+    def __getitem__(self, key):
+        return self._get_child(key, dict.__getitem__(self, key))
+
+    # Overriding __iter__ makes dict() and ** go through __getitem__ too
+    def __iter__(self):
+        return dict.__iter__(self)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def values(self):
+        return collections.abc.ValuesView(self)
+
+    def items(self):
+        return collections.abc.ItemsView(self)
+
+    def pop(self, key, default=missing):
+        if key not in self and default is not missing:
+            return default
+        value = self[key]
+        del self[key]
+        return value
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        dict.__setitem__(self, key, value)  # Back to be popped as a view
+        return key, self.pop(key)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def __or__(self, other):
+        if not isinstance(other, dict):
+            return NotImplemented
+        result = dict(self)
+        result.update(other)
+        return result
+
+    def __ror__(self, other):
+        if not isinstance(other, dict):
+            return NotImplemented
+        result = dict(other)
+        result.update(self)
+        return result
+
+    def _store(self, key, child):
+        dict.__setitem__(self, key, child)
+
+    def _resolve(self, memo):
+        # Items still shared with the base class can't contain views
+        original = self._original
+        return {
+            key: value if original.get(key, missing) is value else resolve(value, memo)
+            for key, value in dict.items(self)
+        }
+
+    __setitem__ = mutator(dict.__setitem__)
+    __delitem__ = mutator(dict.__delitem__)
+    update = mutator(dict.update)
+    clear = mutator(dict.clear)
+    if hasattr(dict, "__ior__"):
+        __ior__ = mutator(dict.__ior__)
+
+
+class ListProxy(CopyOnWrite, list):
+    __slots__ = ("_original", "_parent", "_dirty")
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[index] for index in range(len(self))[i]]
+        if i < 0:
+            i += len(self)  # Share the views of negative indexes
+        return self._get_child(i, list.__getitem__(self, i))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __reversed__(self):
+        for index in reversed(range(len(self))):
+            yield self[index]
+
+    def __add__(self, other):
+        return list.__add__(list(self), other)
+
+    def __radd__(self, other):
+        if not isinstance(other, list):
+            return NotImplemented
+        return list(other) + list(self)
+
+    def __mul__(self, count):
+        return list(self) * count
+
+    __rmul__ = __mul__
+
+    def pop(self, index=-1):
+        value = self[index]
+        del self[index]
+        return value
+
+    def _store(self, index, child):
+        list.__setitem__(self, index, child)
+
+    def _resolve(self, memo):
+        shared = set(map(id, self._original))
+        return [
+            value if id(value) in shared else resolve(value, memo)
+            for value in list.__iter__(self)
+        ]
+
+    __setitem__ = mutator(list.__setitem__)
+    __delitem__ = mutator(list.__delitem__)
+    __iadd__ = mutator(list.__iadd__)
+    __imul__ = mutator(list.__imul__)
+    append = mutator(list.append)
+    insert = mutator(list.insert)
+    remove = mutator(list.remove)
+    clear = mutator(list.clear)
+    reverse = mutator(list.reverse)
+    sort = mutator(list.sort)
+    extend = mutator(list.extend)
@@ -1,3 +1,4 @@
+import collections.abc
 import contextlib
 import functools
 import os
@@ -6,32 +7,229 @@ import types
 
 from django.core.exceptions import ImproperlyConfigured
 
-from . import parsers
+from . import envfiles, files, parsers, profiling
+from .meta import is_stored
 from .options import Options
-from .utils import missing
+from .utils import ContextVar, missing
 
+# Stack of (namespace, body code) for the Settings class bodies being run
+_namespaces = ContextVar("class_settings.namespaces", default=())
+
+
+def push_namespace(namespace, body_code, frame=None):
+    """Mark namespace as active while the class body body_code, run by the class
+    statement in frame, runs, or until it's popped if body_code is None.
+    """
+    stack = _namespaces.get()
+    if frame is not None:
+        # Drop the bodies that raised before their class could be created
+        while stack and not is_running(stack[-1][1], frame):
+            stack = stack[:-1]
+    _namespaces.set(stack + ((namespace, body_code),))
+
+
+def pop_namespace(namespace):
+    stack = _namespaces.get()
+    for index in reversed(range(len(stack))):
+        if stack[index][0] is namespace:
+            _namespaces.set(stack[:index])
+            break
+
+
+def get_namespace(frame):
+    """Return the namespace of the Settings class body frame is running in."""
+    stack = _namespaces.get()
+    while stack:
+        namespace, body_code = stack[-1]
+        # Checking the caller first keeps lookups from the body constant time
+        if frame.f_code is body_code or is_running(body_code, frame.f_back):
+            return namespace
+        # The class body raised before the class could be created
+        stack = stack[:-1]
+        _namespaces.set(stack)
+    return None
+
+
+def is_assignment(frame):
+    """Return whether the call frame is making from the Settings class body
+    being run is assigned straight to a name.
+    """
+    stack = _namespaces.get()
+    return (
+        bool(stack)
+        and frame.f_code is stack[-1][1]
+        and is_stored(frame.f_code, frame.f_lasti)
+    )
+
+
+def is_running(body_code, frame):
+    if body_code is None:
+        return True
+    while frame is not None:
+        if frame.f_code is body_code:
+            return True
+        frame = frame.f_back
+    return False
+
+
+# Callables that always return the same for the same arguments, on top of the
+# parsers registered as pure, so they can be passed to cached parsers
+_pure_callables = {bool, bytes, complex, float, int, str, *parsers._builtin_parsers}
+
+# Recorders of the environment variables being read, see Recorder
+_recorders = []
+
+
+def get_source(source):
+    if source is None:
+        return os.environ
+    if isinstance(source, (list, tuple)):
+        return collections.ChainMap(*map(get_source, source))
+    return source
+
+
+class Snapshot(dict):
+    """A copy of a mapping, os.environ by default, taken on creation.
+
+    Lookups are plain dict lookups and won't see any changes made to the
+    mapping until refresh is called.
+    """
+
+    def __init__(self, environ=None):
+        super().__init__()
+        self._environ = environ if environ is not None else os.environ
+        self.refresh()
+
+    def refresh(self):
+        environ = dict(self._environ)
+        # Readers see either the old or the new value, never a missing one
+        self.update(environ)
+        for name in self.keys() - environ.keys():
+            self.pop(name, None)
+
+
+class Overlay(collections.abc.Mapping):
+    """Values read from the .env files files layered over another source."""
+
+    def __init__(self, values, source, files=()):
+        self.values = values
+        self.source = source
+        self.files = files
+
+    def __getitem__(self, key):
+        try:
+            return self.values[key]
+        except KeyError:
+            return self.source[key]
+
+    def get(self, key, default=None):
+        value = self.values.get(key, missing)
+        if value is missing:
+            return self.source.get(key, default)
+        return value
+
+    def __contains__(self, key):
+        return key in self.values or key in self.source
+
+    def __iter__(self):
+        yield from self.values
+        for key in self.source:
+            if key not in self.values:
+                yield key
+
+    def __len__(self):
+        return len(self.values.keys() | self.source.keys())
+
+
+class Recorder:
+    """Records the Envs, environment variables, and files settings are read
+    from.
+    """
 
-class Env:
     def __init__(self):
+        self.envs = set()
+        self.environ = {}
+        self.files = set()
+        self.provided = set()
+        self.verifiable = True
+
+    def __enter__(self):
+        _recorders.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _recorders.remove(self)
+
+    def record(self, env, name):
+        self.envs.add(env)
+        source = env._source
+        if isinstance(source, Overlay):
+            # Its values come from the files, which may have been read before
+            # recording started, so they're fingerprinted here
+            for file in source.files:
+                self.files.add(os.path.abspath(file))
+            if name in source.values:
+                self.provided.add(name)
+            source = source.source
+        if isinstance(source, Snapshot):
+            source = source._environ  # Its values are checked against it
+        if source is not os.environ:
+            self.verifiable = False  # Only os.environ can be checked later
+        self.environ[name] = source.get(name)
+
+    def record_file(self, file, *, provided=()):
+        self.files.add(os.path.abspath(file))
+        # Their values come from the file, which is fingerprinted instead
+        self.provided.update(provided)
+
+
+_outside_options = Options(types.SimpleNamespace(env_prefix=None))
+
+
+class Env:
+    def __init__(self, source=None, *, cache=None, file_suffix="_FILE"):
         self._prefix = missing
+        self._source = get_source(source)
         self._parsers = {}
+        # Functions registered as pure parsers, which may be passed to others
+        self._pure_funcs = set(_pure_callables)
+        self.cache = cache
+        self.file_suffix = file_suffix
+        # The (files, export, values) of the .env files read, in order
+        self._env_files = []
         # Populate with default parsers
         for name, parser in vars(parsers).items():
             if name.startswith("_"):
                 continue
             if callable(parser):
-                self.parser(parser)
+                self.parser(parser, pure=True)
+        self.parser(read_file, name="file", batch=True)
 
     def __call__(self, name=None, *, prefix=missing, default=missing, optional=False):
-        from .settings import SettingsDict
-
         frame = sys._getframe(1)
-        while frame is not None:
-            f_locals = frame.f_locals
-            if isinstance(f_locals, SettingsDict):
-                options = f_locals.options
-                break
-            frame = frame.f_back
+        prefix, deferred, namespace = self._prepare(
+            frame, name, prefix, default, optional
+        )
+        if deferred is not None:
+            return deferred
+        value = self._lookup(name, prefix, default)
+        if namespace is not None:
+            recipe = DeferredEnv(
+                self, name=name, prefix=prefix, default=default, optional=False
+            )
+            namespace.add_read(recipe, value)
+        return value
+
+    def _prepare(self, frame, name, prefix, default, optional, batch=False):
+        """Resolve the prefix and defer the lookup if it has to be deferred.
+
+        Lookups in Settings subclasses are batched to run concurrently on class
+        creation if batch is true or they fall back to reading a file. The
+        namespace of the Settings subclass, if any, is returned too.
+        """
+        namespace = get_namespace(frame)
+        if namespace is not None:
+            options = namespace.options
         else:
             if name is None:
                 raise TypeError("'name' is required outside of Settings subclasses")
@@ -39,28 +237,67 @@ class Env:
                 raise TypeError(
                     "'optional' is only applicable inside Settings subclasses"
                 )
-            meta = types.SimpleNamespace(env_prefix=None)
-            options = Options(meta)
-
-        if name is None or optional:
-            kwargs = {"name": name, "prefix": prefix, "default": default}
-            return DeferredEnv(self, kwargs=kwargs, optional=optional)
-        prefix = (
-            prefix
-            if prefix is not missing
-            else self._prefix
-            if self._prefix is not missing
-            else options.env_prefix
-        )
+            options = _outside_options
+
+        if prefix is missing:
+            prefix = self._prefix if self._prefix is not missing else options.env_prefix
+        deferred = None
+        # Lookups nested in expressions are parsed right away instead
+        if name is None or optional or (options.lazy and is_assignment(frame)):
+            deferred = DeferredEnv(
+                self, name=name, prefix=prefix, default=default, optional=optional
+            )
+        if namespace is not None and not options.lazy:
+            if batch or (name is not None and self._get_file_name(name, prefix)):
+                if deferred is None and is_assignment(frame):
+                    deferred = DeferredEnv(
+                        self,
+                        name=name,
+                        prefix=prefix,
+                        default=default,
+                        optional=optional,
+                    )
+                if deferred is not None:
+                    deferred._batched = True
+        return prefix, deferred, namespace
+
+    def _lookup(self, name, prefix, default=missing):
         name = prefix + name if prefix is not None else name
+        if profiling.enabled:
+            with profiling.timed("env", name):
+                return self._read(name, default)
+        return self._read(name, default)
+
+    def _read(self, name, default):
+        for recorder in _recorders:
+            recorder.record(self, name)
+        value = self._source.get(name, missing)
+        if value is missing and self.file_suffix is not None:
+            value = self._read_file(name)
+        if value is not missing:
+            return value
         if default is not missing:
-            return os.environ.get(name, default)
-        try:
-            return os.environ[name]
-        except KeyError:
-            raise ImproperlyConfigured(
-                "Environment variable {!r} not set".format(name)
-            ) from None
+            return default
+        raise ImproperlyConfigured("Environment variable {!r} not set".format(name))
+
+    def _get_file_name(self, name, prefix=None):
+        """Return the name of the variable with the path of the file to fall
+        back to if name isn't set, or None if there's none.
+        """
+        name = prefix + name if prefix is not None else name
+        if self.file_suffix is None or name in self._source:
+            return None
+        file_name = name + self.file_suffix
+        return file_name if file_name in self._source else None
+
+    def _read_file(self, name):
+        file_name = name + self.file_suffix
+        for recorder in _recorders:
+            recorder.record(self, file_name)
+        path = self._source.get(file_name)
+        if path is None:
+            return missing
+        return read_file(path)
 
     def __getattr__(self, name):
         try:
@@ -71,12 +308,59 @@ class Env:
                 "{!r} object has no attribute {!r}".format(cls_name, name)
             ) from None
 
-    @staticmethod
-    def read_env(file=None):
-        from dotenv import load_dotenv
+    def read_env(self, *files, export=False):
+        """Read the .env files, .env by default, into the source.
+
+        Later files take precedence and missing files are skipped. The values
+        are layered over the source unless export is true, in which case
+        they're written into os.environ instead.
+        """
+        files = files or (".env",)
+        self._source, values = self._load_env(files, export, self._source)
+        # Reading files again moves them over the ones read since
+        self._env_files = [
+            entry for entry in self._env_files if entry[:2] != (files, export)
+        ]
+        self._env_files.append((files, export, values))
+
+    def _load_env(self, files, export, source, exported=None):
+        """Return source with the values of the .env files layered over it,
+        and the values.
 
-        file = file if file is not None else ".env"
-        load_dotenv(file, override=True)
+        exported are the values the files exported before, the ones that have
+        since been removed from them are removed from os.environ.
+        """
+        values = envfiles.load(*files, environ=source)
+        for recorder in _recorders:
+            for file in files:
+                recorder.record_file(file, provided=values)
+        if export:
+            for key in (exported or {}).keys() - values.keys():
+                if os.environ.get(key) == exported[key]:  # Unless changed since
+                    del os.environ[key]
+            os.environ.update(values)
+        elif isinstance(source, Overlay):
+            source = Overlay(
+                {**source.values, **values}, source.source, source.files + files
+            )
+        else:
+            source = Overlay(values, source, files)
+        return source, values
+
+    def reload_env(self):
+        """Read the .env files that have been read again, dropping the values
+        that have since been removed from them, from os.environ too for the
+        exported ones.
+        """
+        source = self._source
+        if isinstance(source, Overlay):
+            source = source.source
+        env_files = []
+        for env_file_names, export, exported in list(self._env_files):
+            source, values = self._load_env(env_file_names, export, source, exported)
+            env_files.append((env_file_names, export, values))
+        self._source = source  # Swapped at once for the concurrent lookups
+        self._env_files = env_files
 
     @contextlib.contextmanager
     def prefixed(self, prefix):
@@ -90,46 +374,158 @@ class Env:
         finally:
             self._prefix = old_prefix
 
-    def parser(self, _func=None, *, name=None, parse_default=False):
+    @contextlib.contextmanager
+    def using(self, source):
+        old_source = self._source
+        self._source = get_source(source)
+        try:
+            yield
+        finally:
+            self._source = old_source
+
+    def parser(
+        self, _func=None, *, name=None, parse_default=False, pure=False, batch=False
+    ):
         def decorator(func):
-            @functools.wraps(func)
-            def parser(name=None, *, prefix=missing, default=missing, **kwargs):
+            if pure:
+                self._pure_funcs.add(func)
+            parse = self._cached(func) if pure else func
+            parser_name = name if name is not None else func.__name__
+
+            def parse_env(name, prefix, default, kwargs):
                 try:
-                    value = self(name, prefix=prefix)
+                    value = self._lookup(name, prefix)
                 except ImproperlyConfigured:
                     if default is not missing:
                         if parse_default:
-                            default = func(default, **kwargs)
+                            default = parse(default, **kwargs)
                         return default
                     raise
-                if isinstance(value, DeferredEnv):
-                    value._parser = functools.partial(parser, **kwargs)
-                else:
-                    value = func(value, **kwargs)
+                if profiling.enabled:
+                    with profiling.timed("parser", parser_name):
+                        return parse(value, **kwargs)
+                return parse(value, **kwargs)
+
+            @functools.wraps(func)
+            def parser(
+                name=None, *, prefix=missing, default=missing, optional=False, **kwargs
+            ):
+                frame = sys._getframe(1)
+                prefix, deferred, namespace = self._prepare(
+                    frame, name, prefix, default, optional, batch
+                )
+                if deferred is not None:
+                    deferred._parser = parse_env
+                    deferred._parser_kwargs = kwargs
+                    return deferred
+                value = parse_env(name, prefix, default, kwargs)
+                if namespace is not None:
+                    recipe = DeferredEnv(
+                        self, name=name, prefix=prefix, default=default, optional=False
+                    )
+                    recipe._parser = parse_env
+                    recipe._parser_kwargs = kwargs
+                    namespace.add_read(recipe, value)
                 return value
 
-            parser_name = name if name is not None else func.__name__
             self._parsers[parser_name] = parser
             return func
 
         return decorator if _func is None else decorator(_func)
 
+    def _cached(self, func):
+        """Wrap the pure parser func to go through the cache when it's set."""
+        defaults = None
+
+        def parse(value, **kwargs):
+            nonlocal defaults
+            cache = self.cache
+            if cache is None:
+                return func(value, **kwargs)
+            if defaults is None:
+                defaults = get_defaults(func)
+            try:
+                kwargs_items = frozenset(
+                    (name, type(item), item)
+                    for name, item in {**defaults, **kwargs}.items()
+                )
+                if any(
+                    callable(item) and item not in self._pure_funcs
+                    for _, _, item in kwargs_items
+                ):
+                    # Like a subparser that may not always return the same
+                    return func(value, **kwargs)
+                # The types keep 1 and True from sharing an entry
+                key = (func, type(value), value, kwargs_items)
+                result = cache.get(key)
+            except TypeError:  # Unhashable value or kwargs
+                return func(value, **kwargs)
+            if result is missing:
+                result = func(value, **kwargs)
+                cache.set(key, result)
+            return result
+
+        return parse
+
+
+def get_defaults(func):
+    """Return the default values of the keyword arguments of the parser func."""
+    import inspect
+
+    try:
+        signature = inspect.signature(func, follow_wrapped=False)
+        parameters = list(signature.parameters.values())[1:]
+    except (TypeError, ValueError):  # Some builtins have no signature
+        parameters = []
+    return {
+        parameter.name: parameter.default
+        for parameter in parameters
+        if parameter.default is not parameter.empty
+    }
+
+
+@functools.wraps(files.read)
+def read_file(path, **kwargs):
+    for recorder in _recorders:
+        recorder.record_file(path)
+    return files.read(path, **kwargs)
+
 
 class DeferredEnv:
-    def __init__(self, env, *, kwargs, optional):
+    __slots__ = (
+        "_env",
+        "_parser",
+        "_parser_kwargs",
+        "_batched",
+        "_name",
+        "_prefix",
+        "_default",
+        "_optional",
+    )
+
+    def __init__(self, env, *, name, prefix, default, optional):
         self._env = env
         self._parser = None
-        self._kwargs = kwargs
+        self._parser_kwargs = None
+        self._batched = False
+        self._name = name
+        self._prefix = prefix
+        self._default = default
         self._optional = optional
 
     def _parse(self, name):
-        kwargs = self._kwargs.copy()
-        name_kwarg = kwargs.pop("name")
-        name = name_kwarg if name_kwarg is not None else name
+        name = self._name if self._name is not None else name
         if self._parser is not None:
-            return self._parser(name, **kwargs)
+            return self._parser(name, self._prefix, self._default, self._parser_kwargs)
         else:
-            return self._env(name, **kwargs)
+            return self._env._lookup(name, self._prefix, self._default)
+
+    def _get_names(self, name):
+        """Return the names of the environment variables the lookup reads."""
+        name = self._name if self._name is not None else name
+        full_name = self._prefix + name if self._prefix is not None else name
+        file_name = self._env._get_file_name(name, self._prefix)
+        return [full_name] if file_name is None else [full_name, file_name]
 
 
 env = Env()
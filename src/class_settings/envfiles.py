@@ -0,0 +1,86 @@
+""".env file loading.
+
+Files are made of ``KEY=value`` lines, optionally prefixed with ``export``.
+Values can be unquoted, with ``#`` starting a comment when preceded by
+whitespace, single quoted to be taken literally, or double quoted to support
+escapes like ``\\n``. Quoted values can span multiple lines. ``${NAME}`` and
+``${NAME:-default}`` in unquoted and double quoted values are expanded.
+"""
+
+import collections
+import os
+import re
+
+_entry = re.compile(
+    r"""
+    ^[ \t]*(?:export[ \t]+)?
+    (?P<key>[A-Za-z_][A-Za-z0-9_.]*)
+    [ \t]*=[ \t]*
+    (?:
+        '(?P<single>(?:\\'|[^'])*)'
+      | "(?P<double>(?:\\.|[^"\\])*)"
+      | (?P<plain>[^\n]*?)
+    )
+    (?:[ \t]+\#[^\n]*)?[ \t]*$
+    """,
+    re.MULTILINE | re.VERBOSE,
+)
+_escape = re.compile(r"\\(.)", re.DOTALL)
+_escapes = {"n": "\n", "r": "\r", "t": "\t", '"': '"', "'": "'", "\\": "\\"}
+_variable = re.compile(r"\$\{(?P<name>[^}:]+)(?::-(?P<default>[^}]*))?\}")
+
+
+def parse(text, *, environ=None):
+    """Return the entries of the .env file contents text.
+
+    Variables are expanded from the entries before them, falling back to
+    environ, os.environ by default.
+    """
+    if "\r" in text:
+        text = text.replace("\r\n", "\n")
+    environ = environ if environ is not None else os.environ
+    values = {}
+    lookup = collections.ChainMap(values, environ)
+
+    def expand(match):
+        default = match.group("default")
+        return lookup.get(match.group("name"), default if default else "")
+
+    for match in _entry.finditer(text):
+        key, single, double, value = match.group("key", "single", "double", "plain")
+        if single is not None:
+            value = single.replace("\\'", "'")
+        elif double is not None:
+            value = double
+            if "\\" in value:
+                value = _escape.sub(
+                    lambda match: _escapes.get(match.group(1), match.group()), value
+                )
+        if single is None and "${" in value:
+            value = _variable.sub(expand, value)
+        values[key] = value
+    return values
+
+
+def read(file, *, environ=None):
+    """Return the entries of the .env file at file, or None if it's missing."""
+    try:
+        with open(file, encoding="utf-8-sig") as f:
+            text = f.read()
+    except FileNotFoundError:
+        return None
+    return parse(text, environ=environ)
+
+
+def load(*files, environ=None):
+    """Return the entries of the .env files layered over each other.
+
+    Entries of later files take precedence, missing files are skipped.
+    """
+    environ = environ if environ is not None else os.environ
+    values = {}
+    for file in files:
+        entries = read(file, environ=collections.ChainMap(values, environ))
+        if entries is not None:
+            values.update(entries)
+    return values
@@ -0,0 +1,46 @@
+"""Reading settings from files, such as secrets mounted by Docker or Kubernetes."""
+
+import os
+
+from . import profiling
+
+# The default limit on the size of the files read, in bytes
+MAX_SIZE = 1024 * 1024
+
+
+def read(path, *, binary=False, max_size=MAX_SIZE, mmap=False, encoding="utf-8"):
+    """Return the contents of the file at path.
+
+    Text is returned without its trailing newlines. If mmap is true the file is
+    memory-mapped read-only and the mapping is returned instead, which avoids
+    copying large files such as certificates. A ValueError is raised if the
+    file is larger than max_size, None disables the limit.
+    """
+    if profiling.enabled:
+        with profiling.timed("file", path):
+            return _read(path, binary, max_size, mmap, encoding)
+    return _read(path, binary, max_size, mmap, encoding)
+
+
+def _read(path, binary, max_size, mmap, encoding):
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        if max_size is not None and size > max_size:
+            raise ValueError(
+                "{!r} is {} bytes, over the limit of {} bytes".format(
+                    path, size, max_size
+                )
+            )
+        if mmap:
+            import mmap as mmap_module
+
+            if not size:
+                return b""  # Empty files can't be mapped
+            return mmap_module.mmap(file.fileno(), 0, access=mmap_module.ACCESS_READ)
+        # Guard against files growing after the size check
+        data = file.read(max_size + 1 if max_size is not None else -1)
+    if max_size is not None and len(data) > max_size:
+        raise ValueError("{!r} is over the limit of {} bytes".format(path, max_size))
+    if binary:
+        return data
+    return data.decode(encoding).rstrip("\r\n")
@@ -0,0 +1,219 @@
+"""Freezing evaluated settings into artifacts that load without evaluation.
+
+An artifact holds the resolved settings along with a fingerprint of what they
+were evaluated from: the environment variables read, the source and .env files
+involved, and the versions of Python, Django, and django-class-settings. It's
+only loaded while the fingerprint still matches.
+"""
+
+import importlib
+import os
+import pickle
+import sys
+import types
+
+import django
+from django.core.exceptions import ImproperlyConfigured
+
+from . import __version__
+from .env import Recorder
+
+FORMAT_VERSION = 1
+
+
+def get_versions():
+    return {
+        "python": sys.version,
+        "django": django.__version__,
+        "class_settings": __version__,
+    }
+
+
+def get_signature(file):
+    try:
+        stat = os.stat(file)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def evaluate(name):
+    """Evaluate the Settings class name, formatted as module:class, while
+    recording what it reads.
+
+    Return the recorder and the settings.
+    """
+    from .settings import Settings
+
+    module_name, _, class_name = name.rpartition(":")
+    if module_name in sys.modules:
+        raise ValueError(
+            "{!r} has already been imported, its environment variable reads "
+            "can't be recorded".format(module_name)
+        )
+    with Recorder() as recorder:
+        module = importlib.import_module(module_name)
+        settings_cls = getattr(module, class_name)
+        if not (isinstance(settings_cls, type) and issubclass(settings_cls, Settings)):
+            raise TypeError("{!r} is not a Settings subclass".format(class_name))
+        settings = settings_cls()
+    return recorder, settings
+
+
+def build(name, recorder, settings):
+    """Return the frozen data of settings, evaluated as name under recorder.
+
+    Lazy settings are resolved under the recorder too.
+    """
+    from .settings import Settings
+
+    with recorder:
+        values = dict(settings.items())
+    if not recorder.verifiable:
+        raise ValueError(
+            "Settings reading from sources other than os.environ can't be frozen"
+        )
+    for cls in type(settings).__mro__:
+        if issubclass(cls, Settings) and cls is not Settings:
+            file = getattr(sys.modules.get(cls.__module__), "__file__", None)
+            if file is not None:
+                recorder.record_file(file)
+    overridden = [setting for setting in values if settings.is_overridden(setting)]
+    # Leave out the defaults that can be imported instead
+    default_settings = settings._options.default_settings
+    defaults = None
+    if isinstance(default_settings, types.ModuleType):
+        defaults = default_settings.__name__
+        values = {setting: values[setting] for setting in overridden}
+    return {
+        "format": FORMAT_VERSION,
+        "name": name,
+        "doc": type(settings).__doc__,
+        "versions": get_versions(),
+        "environ": {
+            key: value
+            for key, value in recorder.environ.items()
+            if key not in recorder.provided
+        },
+        "files": {file: get_signature(file) for file in sorted(recorder.files)},
+        "settings": values,
+        "defaults": defaults,
+        "overridden": overridden,
+    }
+
+
+def freeze(name, path):
+    """Evaluate the Settings class name and write the results to path."""
+    data = build(name, *evaluate(name))
+    write(path, pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def write(path, content):
+    temp_path = "{}.{}".format(path, os.getpid())
+    with open(temp_path, "wb") as file:
+        file.write(content)
+    os.replace(temp_path, path)
+
+
+def is_fresh(data, name):
+    """Return whether the frozen data still matches its fingerprint."""
+    if data.get("format") != FORMAT_VERSION or data.get("name") != name:
+        return False
+    if data["versions"] != get_versions():
+        return False
+    for file, signature in data["files"].items():
+        if get_signature(file) != signature:
+            return False
+    environ = os.environ
+    for key, value in data["environ"].items():
+        if environ.get(key) != value:
+            return False
+    return True
+
+
+def load(path, name):
+    """Return the frozen data at path if it's for name and still fresh."""
+    try:
+        with open(path, "rb") as file:
+            data = pickle.load(file)
+    except Exception:  # Missing, corrupt, or referencing what no longer exists
+        return None
+    if not isinstance(data, dict) or not is_fresh(data, name):
+        return None
+    return data
+
+
+# How many sets of dependencies to keep per Settings class in a cache directory
+MAX_DEPENDENCIES = 16
+
+
+def get_fingerprint(environ, files):
+    """Return a hash of the current state of the environment variables and
+    files the settings depend on.
+    """
+    import hashlib
+
+    hasher = hashlib.sha256(repr(sorted(get_versions().items())).encode())
+    for key in sorted(environ):
+        hasher.update(repr((key, os.environ.get(key))).encode())
+    for file in sorted(files):
+        hasher.update(repr((file, get_signature(file))).encode())
+    return hasher.hexdigest()
+
+
+def get_cache_path(cache_dir, name, suffix):
+    return os.path.join(cache_dir, "{}.{}".format(name.replace(":", "."), suffix))
+
+
+def load_dependencies(cache_dir, name):
+    try:
+        with open(get_cache_path(cache_dir, name, "dependencies"), "rb") as file:
+            return pickle.load(file)
+    except Exception:
+        return []
+
+
+def load_cached(cache_dir, name):
+    """Return the cached data of name matching the current environment."""
+    for environ, files in load_dependencies(cache_dir, name):
+        fingerprint = get_fingerprint(environ, files)
+        data = load(get_cache_path(cache_dir, name, fingerprint), name)
+        if data is not None:
+            return data
+    return None
+
+
+def store_cached(cache_dir, name, recorder, settings):
+    """Cache the settings evaluated as name under recorder.
+
+    Return whether they could be cached, which they can't if they can't be
+    pickled or read from other sources than os.environ.
+    """
+    try:
+        data = build(name, recorder, settings)
+        content = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+    except (
+        ImproperlyConfigured,
+        ValueError,
+        TypeError,
+        AttributeError,
+        RecursionError,
+        pickle.PicklingError,
+    ):
+        return False
+    dependencies = (tuple(sorted(data["environ"])), tuple(data["files"]))
+    fingerprint = get_fingerprint(*dependencies)
+    all_dependencies = [
+        other for other in load_dependencies(cache_dir, name) if other != dependencies
+    ]
+    all_dependencies = [dependencies, *all_dependencies][:MAX_DEPENDENCIES]
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        write(get_cache_path(cache_dir, name, fingerprint), content)
+        write(
+            get_cache_path(cache_dir, name, "dependencies"),
+            pickle.dumps(all_dependencies, protocol=pickle.HIGHEST_PROTOCOL),
+        )
+    except OSError:
+        return False
+    return True
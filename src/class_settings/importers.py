@@ -1,7 +1,6 @@
 import importlib.machinery
-import inspect
 import os
-import pathlib
+import sys
 import time
 import types
 import warnings
@@ -10,7 +9,8 @@ import django
 from django.core.exceptions import ImproperlyConfigured
 from django.utils.functional import LazyObject
 
-from .settings import Settings
+from . import overlays, profiling
+from .env import Recorder
 from .utils import missing
 
 
@@ -40,11 +40,16 @@ class LazySettingsModule(LazyObject):
             )
         module = importlib.import_module(settings_module)
         # Keep updated against django.conf.Settings.__init__
-        self.check_tuple_settings(module)
-        self.check_secret_key(module)
-        self.check_default_content_type(module)
-        self.check_file_charset(module)
-        self.check_time_zone(module)
+        checks = [
+            self.check_tuple_settings,
+            self.check_secret_key,
+            self.check_default_content_type,
+            self.check_file_charset,
+            self.check_time_zone,
+        ]
+        for check in checks:
+            with profiling.timed("check", check.__name__):
+                check(module)
         self._wrapped = module
 
     def check_tuple_settings(self, module):
@@ -87,6 +92,8 @@ class LazySettingsModule(LazyObject):
     def check_time_zone(self, module):
         time_zone = getattr(module, "TIME_ZONE", False)
         if time_zone and hasattr(time, "tzset"):
+            import pathlib
+
             zoneinfo_root = pathlib.Path("/usr/share/zoneinfo")
             zoneinfo_file = zoneinfo_root.joinpath(*time_zone.split("/"))
             if zoneinfo_root.exists() and not zoneinfo_file.exists():
@@ -95,17 +102,99 @@ class LazySettingsModule(LazyObject):
             time.tzset()
 
 
+@overlays.register
 class SettingsModule(types.ModuleType):
-    def __init__(self, name, settings):
+    def __init__(self, name, settings, recorder=None):
         super().__init__(name, settings.__doc__)
+        self.__dict__.update(self._get_namespace(settings))
         self.SETTINGS_MODULE = name
         self.SETTINGS_CLASS = settings
+        # What the settings were read from, see reloading.Watcher
+        self._recorder = recorder if recorder is not None else Recorder()
+        settings._module = self  # Settings.recompute swaps its changes in
+
+    @staticmethod
+    def _get_namespace(settings):
+        # Serve the plain settings straight from the module's namespace, leaving
+        # descriptors to be resolved on the instance by __getattr__
+        namespace = dict(type(settings)._get_settings(plain=True))
+        for setting, value in vars(settings).items():
+            if setting.isupper():
+                namespace[setting] = value
+        return namespace
+
+    def reload(self, settings, recorder=None):
+        """Swap in the settings of the reevaluated Settings instance settings,
+        read from what recorder recorded, dropping the changed ones from
+        django.conf.settings's cache.
+
+        Return the names of the settings whose values changed.
+        """
+        from django.conf import settings as django_settings
+
+        old_namespace = dict(self.__dict__)
+        old_settings = old_namespace.pop("SETTINGS_CLASS")
+        del old_namespace["SETTINGS_MODULE"]
+        namespace = self._get_namespace(settings)
+        # Resolve the descriptors that were resolved before to compare them too
+        for name in old_namespace:
+            if name.isupper() and name not in namespace:
+                try:
+                    namespace[name] = getattr(settings, name)
+                except AttributeError:
+                    pass  # Optional
+        changed = [
+            name
+            for name, value in namespace.items()
+            if old_namespace.get(name, missing) is not value
+            and old_namespace.get(name, missing) != value
+        ]
+        removed = [
+            name for name in old_namespace if name.isupper() and name not in namespace
+        ]
+        namespace["SETTINGS_CLASS"] = settings
+        namespace["_recorder"] = recorder if recorder is not None else Recorder()
+        self.__dict__.update(namespace)  # A single update to swap them at once
+        for name in removed:
+            self.__dict__.pop(name, None)
+        if old_settings is not settings:
+            old_settings.__dict__.pop("_module", None)
+            settings._module = self
+        changed += removed
+        for name in changed:
+            django_settings.__dict__.pop(name, None)
+        return changed
 
     def __dir__(self):
-        return {*super().__dir__(), *dir(self.SETTINGS_CLASS)}
+        return self.SETTINGS_CLASS.__dir__() | self.__dict__.keys()
 
     def __getattr__(self, name):
-        return getattr(self.SETTINGS_CLASS, name)
+        value = getattr(self.SETTINGS_CLASS, name)
+        if name.isupper():
+            self.__dict__[name] = value
+        return value
+
+
+@overlays.register
+class FrozenSettingsModule(types.ModuleType):
+    def __init__(self, name, frozen):
+        super().__init__(name, frozen["doc"])
+        self.__dict__.update(frozen["settings"])
+        self._overridden = frozenset(frozen["overridden"])
+        self._defaults = frozen["defaults"]
+        self.SETTINGS_MODULE = name
+
+    def __getattr__(self, name):
+        if self._defaults is None or not name.isupper():
+            raise AttributeError(
+                "module {!r} has no attribute {!r}".format(self.__name__, name)
+            )
+        value = getattr(importlib.import_module(self._defaults), name)
+        self.__dict__[name] = value
+        return value
+
+    def is_overridden(self, setting):
+        return setting in self._overridden
 
 
 class SettingsImporter:
@@ -118,8 +207,31 @@ class SettingsImporter:
 
     @classmethod
     def create_module(cls, spec):
+        with profiling.timed("import", spec.name):
+            return cls._create_module(spec)
+
+    @classmethod
+    def _create_module(cls, spec):
         settings_module, settings_class = spec.name.rsplit(":", maxsplit=1)
-        module = importlib.import_module(settings_module)
+        frozen_path = os.environ.get("DJANGO_SETTINGS_FROZEN")
+        cache_dir = os.environ.get("CLASS_SETTINGS_CACHE_DIR")
+        if frozen_path or cache_dir:
+            from . import frozen
+
+            data = None
+            if frozen_path:
+                data = frozen.load(frozen_path, spec.name)
+            if data is None and cache_dir:
+                data = frozen.load_cached(cache_dir, spec.name)
+            if data is not None:
+                return FrozenSettingsModule(spec.name, data)
+
+        from .settings import Settings
+
+        # What the settings are read from, to cache them and to watch it
+        fresh = settings_module not in sys.modules
+        with Recorder() as recorder:
+            module = importlib.import_module(settings_module)
         try:
             settings_cls = getattr(module, settings_class)
         except AttributeError:
@@ -128,11 +240,14 @@ class SettingsImporter:
                     settings_module, settings_class
                 )
             ) from None
-        if not (inspect.isclass(settings_cls) and issubclass(settings_cls, Settings)):
+        if not (isinstance(settings_cls, type) and issubclass(settings_cls, Settings)):
             raise ImproperlyConfigured(
                 "{!r} is not a Settings subclass".format(settings_class)
             )
-        return SettingsModule(spec.name, settings_cls())
+        settings = settings_cls()
+        if cache_dir and fresh:
+            frozen.store_cached(cache_dir, spec.name, recorder, settings)
+        return SettingsModule(spec.name, settings, recorder)
 
     @classmethod
     def exec_module(cls, module):
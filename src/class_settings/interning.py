@@ -0,0 +1,65 @@
+"""Sharing equal immutable setting values between Settings classes.
+
+Processes building many similar classes, such as one per tenant, otherwise keep
+a copy of the same hosts, backends, and paths for every class. Strings are
+interned with sys.intern, while bytes and tuples and frozensets of strings and
+bytes are kept in a table for the lifetime of the process. Once the table holds
+MAX_VALUES values, new values are no longer added to it. Dicts and lists can be
+mutated so they're never shared, only the values in them are.
+"""
+
+import sys
+
+# The most values the table keeps alive, as classes built at runtime, such as
+# per tenant, would otherwise grow it for as long as the process runs
+MAX_VALUES = 10000
+
+_values = {}
+
+
+def intern(value):
+    """Return a value equal to value that's shared with the other interned
+    values, interning the values in dicts and lists in place.
+    """
+    value_type = type(value)
+    if value_type is str:
+        return sys.intern(value)
+    elif value_type is dict:
+        for key, item in value.items():
+            interned = intern(item)
+            if interned is not item:
+                value[key] = interned
+        return value
+    elif value_type is list:
+        for index, item in enumerate(value):
+            interned = intern(item)
+            if interned is not item:
+                value[index] = interned
+        return value
+    elif value_type is tuple or value_type is frozenset:
+        items = value_type(intern(item) for item in value)
+        # Only share values made of strings and bytes, as True == 1 == 1.0
+        if not all(map(is_interned, items)):
+            return value
+        value = items
+    elif value_type is not bytes:
+        return value
+    interned = _values.get(value)
+    if interned is not None:
+        return interned
+    if len(_values) < MAX_VALUES:
+        _values[value] = value
+    return value
+
+
+def is_interned(value):
+    if type(value) is str:
+        return True  # Only called on interned values
+    try:
+        return _values.get(value) is value
+    except TypeError:  # Unhashable, like a tuple of lists
+        return False
+
+
+def clear():
+    _values.clear()
@@ -0,0 +1,338 @@
+import __future__
+
+import builtins
+import collections
+import marshal
+import opcode
+import os
+import sys
+import types
+
+# Bump whenever the layout of the cache files changes
+CACHE_VERSION = 2
+
+# "off" disables the cache, "rebuild" ignores and overwrites existing entries
+cache_mode = os.environ.get("CLASS_SETTINGS_CACHE", "on").lower()
+
+# The code flags of functions, as opposed to class bodies, from inspect
+CO_OPTIMIZED = 0x1
+CO_NEWLOCALS = 0x2
+
+CF_MASK = sum(
+    getattr(__future__, feature).compiler_flag
+    for feature in __future__.all_feature_names
+)
+
+_caches = {}
+_indexes = {}
+
+
+def get_meta(frame, name):
+    """Return the Meta class of the class statement being run in frame.
+
+    The Meta class is built straight from the class body's code object when
+    possible, falling back to parsing the source otherwise. None is returned if
+    the class body doesn't define a Meta class.
+    """
+    body_code = get_body_code(frame.f_code, name, frame.f_lineno)
+    if body_code is not None:
+        meta_codes = [
+            code for code in body_code.co_consts if is_class_body(code, "Meta")
+        ]
+        if not meta_codes:
+            return None
+        if len(meta_codes) == 1:
+            meta = build_meta(body_code, meta_codes[0], frame.f_globals)
+            if meta is not None:
+                return meta
+
+    import inspect
+
+    filename = inspect.getsourcefile(frame)
+    if filename is None:
+        if body_code is None:
+            return None
+        raise TypeError("Could not find the source of {}.Meta".format(name))
+    flags = frame.f_code.co_flags & CF_MASK
+    code = get_meta_code(filename, frame.f_lineno, flags, name, frame.f_globals)
+    if code is None:
+        return None
+    locals = {}
+    exec(code, frame.f_globals, locals)
+    return locals["Meta"]
+
+
+def is_class_body(code, name):
+    return (
+        isinstance(code, types.CodeType)
+        and code.co_name == name
+        and not code.co_flags & (CO_OPTIMIZED | CO_NEWLOCALS)
+    )
+
+
+def get_body_code(code, name, lineno):
+    # Decorators make the body start before the class statement's line
+    candidates = [
+        const
+        for const in code.co_consts
+        if is_class_body(const, name) and const.co_firstlineno <= lineno
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda const: const.co_firstlineno)
+
+
+_jump_opcodes = {*opcode.hasjrel, *opcode.hasjabs, *getattr(opcode, "hasjump", ())}
+_hasconst = set(opcode.hasconst)
+_hasname = set(opcode.hasname)
+_cache_opcode = opcode.opmap.get("CACHE")
+
+Instruction = collections.namedtuple("Instruction", ["opname", "arg", "argval"])
+
+
+def encode_instruction(opname, arg):
+    data = bytearray()
+    for shift in [24, 16, 8]:
+        if arg >> shift:
+            data += bytes([opcode.EXTENDED_ARG, arg >> shift & 0xFF])
+    data += bytes([opcode.opmap[opname], arg & 0xFF])
+    return bytes(data)
+
+
+def iter_instructions(code, offset):
+    """Yield the instructions of code from offset onwards.
+
+    This is a cheaper dis.get_instructions that skips EXTENDED_ARG and CACHE
+    entries and only resolves the names and constants.
+    """
+    co_code = code.co_code
+    arg = 0
+    for offset in range(offset, len(co_code), 2):
+        op = co_code[offset]
+        arg |= co_code[offset + 1]
+        if op == opcode.EXTENDED_ARG:
+            arg <<= 8
+            continue
+        if op == _cache_opcode:
+            arg = 0
+            continue
+        if op in _hasconst:
+            argval = code.co_consts[arg]
+        elif op in _hasname:
+            argval = code.co_names[arg]
+        else:
+            argval = arg
+        yield Instruction(opcode.opname[op], arg, argval)
+        arg = 0
+
+
+def is_stored(code, lasti):
+    """Return whether the result of the call at lasti in code, a frame's
+    f_lasti, is stored to a name straight away.
+    """
+    instructions = iter_instructions(code, lasti)
+    if code.co_code[lasti] != _cache_opcode:
+        next(instructions, None)  # The call, its caches are skipped
+    instruction = next(instructions, None)
+    return instruction is not None and instruction.opname == "STORE_NAME"
+
+
+def find_load_const(code, const):
+    """Return the offset of the instruction after the one loading const."""
+    index = next(i for i, value in enumerate(code.co_consts) if value is const)
+    pattern = encode_instruction("LOAD_CONST", index)
+    co_code = code.co_code
+    offset = co_code.find(pattern)
+    while offset != -1:
+        # Skip matches that aren't aligned or are part of a bigger argument
+        if not offset % 2 and (
+            offset < 2 or co_code[offset - 2] != opcode.EXTENDED_ARG
+        ):
+            return offset, offset + len(pattern)
+        offset = co_code.find(pattern, offset + 1)
+    return None
+
+
+def build_meta(body_code, meta_code, globals):
+    """Build the Meta class from its code object without running the body.
+
+    Only plain, unconditional Meta classes without bases, keywords, decorators,
+    or closures are supported. None is returned for everything else.
+    """
+    if meta_code.co_freevars or sys.version_info < (3, 6):
+        return None  # Bytecode isn't made of fixed size instructions before 3.6
+    offsets = find_load_const(body_code, meta_code)
+    if offsets is None:
+        return None
+    start, end = offsets
+    if not _jump_opcodes.isdisjoint(body_code.co_code[:start:2]):
+        return None  # Meta might be defined conditionally
+
+    # Match the variations of `class Meta: ...` followed by `Meta = <class>`
+    instructions = iter_instructions(body_code, end)
+    instruction = next(instructions, None)
+    if instruction is not None and instruction.opname == "LOAD_CONST":
+        instruction = next(instructions, None)  # Qualified name before 3.11
+    if instruction is None or instruction.opname != "MAKE_FUNCTION":
+        return None
+    if instruction.arg:
+        return None
+    instruction = next(instructions, None)
+    if instruction is None or instruction.argval != "Meta":
+        return None
+    instruction = next(instructions, None)
+    if instruction is not None and instruction.opname == "PRECALL":
+        instruction = next(instructions, None)
+    if instruction is None or instruction.opname not in {"CALL", "CALL_FUNCTION"}:
+        return None
+    if instruction.arg != 2:
+        return None
+    instruction = next(instructions, None)
+    if instruction is None or instruction.opname != "STORE_NAME":
+        return None
+    if instruction.argval != "Meta":
+        return None
+
+    function = types.FunctionType(meta_code, globals)
+    return builtins.__build_class__(function, "Meta")
+
+
+def get_meta_code(filename, lineno, flags, name, module_globals=None):
+    try:
+        stat = os.stat(filename)
+    except OSError:  # Not on disk, like zipapp members, so nothing to cache
+        return compile_meta(filename, None, lineno, flags, name, module_globals)
+    if cache_mode == "off":
+        return compile_meta(filename, stat, lineno, flags, name)
+    entries = load_cache(filename, stat)
+    key = (lineno, flags, name)
+    try:
+        return entries[key]
+    except KeyError:
+        pass
+    code = entries[key] = compile_meta(filename, stat, lineno, flags, name)
+    write_cache(filename, stat, entries)
+    return code
+
+
+def compile_meta(filename, stat, lineno, flags, name, module_globals=None):
+    import ast
+
+    class_name, meta_node = get_file_index(filename, stat, module_globals).get(
+        lineno, (None, None)
+    )
+    if class_name != name:
+        return None  # Not created by a class statement
+    if meta_node is None:
+        return None
+    return compile(
+        ast.Module(body=[meta_node], type_ignores=[]),
+        filename="<meta>",
+        mode="exec",
+        flags=flags,
+        dont_inherit=True,
+    )
+
+
+def get_file_index(filename, stat, module_globals=None):
+    """Return a mapping of line numbers to the names and Meta class nodes of the
+    classes defined on them.
+
+    Files on disk are parsed once per process and reparsed only when they
+    change. Files that aren't, which stat is None for, are read through
+    linecache and parsed on every call.
+    """
+    if stat is not None:
+        signature = (stat.st_mtime_ns, stat.st_size)
+        try:
+            cached_signature, index = _indexes[filename]
+        except KeyError:
+            pass
+        else:
+            if cached_signature == signature:
+                return index
+
+    import ast
+
+    if stat is not None:
+        import tokenize
+
+        with tokenize.open(filename) as file:
+            source = file.read()
+    else:
+        import linecache
+
+        source = "".join(linecache.getlines(filename, module_globals))
+    index = {}
+    for node in ast.walk(ast.parse(source, filename)):
+        if not isinstance(node, ast.ClassDef):
+            continue
+        meta_node = None
+        for child in reversed(node.body):
+            if isinstance(child, ast.ClassDef) and child.name == "Meta":
+                meta_node = child
+                break
+        # Cover decorators and the whole header as frames can point anywhere in it
+        start = min([node.lineno, *(dec.lineno for dec in node.decorator_list)])
+        end = max(node.lineno + 1, node.body[0].lineno)
+        for lineno in range(start, end):
+            # Only the Meta nodes are kept, not the whole tree
+            index.setdefault(lineno, (node.name, meta_node))
+    if stat is not None:
+        _indexes[filename] = (signature, index)
+    return index
+
+
+def get_cache_file(filename):
+    import importlib.util
+
+    try:
+        bytecode_file = importlib.util.cache_from_source(filename)
+    except (NotImplementedError, ValueError):
+        return None
+    return os.path.splitext(bytecode_file)[0] + ".class_settings"
+
+
+def load_cache(filename, stat):
+    signature = (stat.st_mtime_ns, stat.st_size)
+    try:
+        cached_signature, entries = _caches[filename]
+    except KeyError:
+        pass
+    else:
+        if cached_signature == signature:
+            return entries
+
+    entries = {}
+    cache_file = get_cache_file(filename)
+    if cache_mode != "rebuild" and cache_file is not None:
+        try:
+            with open(cache_file, "rb") as file:
+                version, *cached_signature, cached_entries = marshal.load(file)
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+        else:
+            if version == CACHE_VERSION and tuple(cached_signature) == signature:
+                entries = cached_entries
+    _caches[filename] = (signature, entries)
+    return entries
+
+
+def write_cache(filename, stat, entries):
+    cache_file = get_cache_file(filename)
+    if sys.dont_write_bytecode or cache_file is None:
+        return
+    data = marshal.dumps((CACHE_VERSION, stat.st_mtime_ns, stat.st_size, entries))
+    temp_file = "{}.{}".format(cache_file, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(temp_file, "wb") as file:
+            file.write(data)
+        os.replace(temp_file, cache_file)
+    except OSError:
+        pass
+
+
+def clear_cache():
+    _caches.clear()
+    _indexes.clear()
@@ -1,13 +1,29 @@
-from django.conf import global_settings
+from .utils import missing
 
 
 class Options:
+    __slots__ = ("_default_settings", "inject_settings", "env_prefix", "lazy")
+
     defaults = {
-        "default_settings": global_settings,
+        "default_settings": missing,  # django.conf.global_settings
         "inject_settings": False,
         "env_prefix": "DJANGO_",
+        "lazy": False,
     }
 
     def __init__(self, meta):
         for option, default in self.defaults.items():
             setattr(self, option, getattr(meta, option, default))
+
+    @property
+    def default_settings(self):
+        if self._default_settings is missing:
+            # Imported on first use as it pulls in most of django.conf
+            from django.conf import global_settings
+
+            self._default_settings = global_settings
+        return self._default_settings
+
+    @default_settings.setter
+    def default_settings(self, value):
+        self._default_settings = value
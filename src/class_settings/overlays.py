@@ -0,0 +1,136 @@
+"""Context-local overrides of the settings.
+
+Overlays are tracked in a context variable, so they only apply to the thread or
+asyncio task that entered them. Settings only get routed through the overlays
+once they've been overlaid, every other setting is read as before.
+"""
+
+import collections.abc
+import contextlib
+import threading
+
+from django.conf import LazySettings
+
+from .utils import ContextVar, missing
+
+_overlay = ContextVar("class_settings.overlay", default=None)
+_targets = []
+_names = set()
+_lock = threading.Lock()
+
+
+class OverlaidSetting:
+    """A setting that's looked up in the active overlay before the instance."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        values = _overlay.get()
+        if values is not None:
+            value = values.get(self.name, missing)
+            if value is not missing:
+                return value
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None  # Falls back to __getattr__
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = value
+
+    def __delete__(self, instance):
+        try:
+            del instance.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+
+def register(cls):
+    """Route the overlaid settings of instances of cls through the overlays."""
+    with _lock:
+        _targets.append(cls)
+        for name in _names:
+            setattr(cls, name, OverlaidSetting(name))
+    return cls
+
+
+def add_names(names):
+    missing_names = names - _names
+    if not missing_names:
+        return
+    with _lock:
+        for name in missing_names - _names:
+            for cls in _targets:
+                setattr(cls, name, OverlaidSetting(name))
+            _names.add(name)
+
+
+@register
+class OverlaidLazySettings(LazySettings):
+    """django.conf.settings with the overlays taking precedence over its cache."""
+
+
+def install(settings):
+    """Make the overlays visible through settings, django.conf.settings."""
+    if type(settings) is LazySettings:
+        # LazyObject proxies __class__ to the wrapped settings
+        object.__dict__["__class__"].__set__(settings, OverlaidLazySettings)
+
+
+def get_values(settings):
+    """Return the settings defined by the Settings class or instance settings."""
+    if not isinstance(settings, type):
+        return dict(_iter_values(type(settings), settings))
+    caches = settings._get_caches()
+    try:
+        return caches["overlay"]
+    except KeyError:
+        pass
+    caches["overlay"] = dict(_iter_values(settings, settings()))
+    return caches["overlay"]
+
+
+def _iter_values(cls, instance):
+    names = {name for base in cls.__mro__ for name in vars(base) if name.isupper()}
+    names.update(name for name in vars(instance) if name.isupper())
+    for name in names:
+        try:
+            yield name, getattr(instance, name)
+        except AttributeError:
+            pass  # Optional
+
+
+@contextlib.contextmanager
+def overlay(settings=None, **values):
+    """Override settings in the current context only.
+
+    The settings can be given as a Settings class or instance, whose own
+    settings are used without the defaults, a mapping, or keyword arguments.
+    Overlays can be nested. Only uppercase names can be overlaid, as Django
+    only treats those as settings, others raise a ValueError.
+    """
+    if settings is None:
+        overrides = values
+    elif isinstance(settings, collections.abc.Mapping):
+        overrides = {**settings, **values}
+    else:
+        overrides = {**get_values(settings), **values}
+    invalid = [
+        name for name in overrides if not (isinstance(name, str) and name.isupper())
+    ]
+    if invalid:
+        raise ValueError(
+            "Only uppercase settings can be overlaid, got {}".format(
+                ", ".join(sorted(map(repr, invalid)))
+            )
+        )
+    add_names(overrides.keys())
+    outer = _overlay.get()
+    _overlay.set({**outer, **overrides} if outer else overrides)
+    try:
+        yield
+    finally:
+        _overlay.set(outer)
@@ -1,25 +1,147 @@
 import builtins
 import functools
-import inspect
+import re
 
 
 def _get_parser(parser):
-    is_builtin = parser in vars(builtins).values()
-    is_class = inspect.isclass(parser)
-    if is_builtin and is_class and parser.__name__ in globals():
-        parser = globals()[parser.__name__]
-    return parser
+    try:
+        return _builtin_parsers.get(parser, parser)
+    except TypeError:  # Unhashable
+        return parser
+
+
+def _compiler(compile):
+    """Cache the pipelines built by compile, keyed by their arguments."""
+    cached_compile = functools.lru_cache(maxsize=256)(compile)
+
+    @functools.wraps(compile)
+    def wrapper(*args):
+        try:
+            return cached_compile(*args)
+        except TypeError:  # Unhashable arguments
+            return compile(*args)
+
+    return wrapper
+
+
+_escape_pattern = re.compile(r"\\(.)", re.DOTALL)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_quoted_pattern(*separators):
+    if builtins.all(len(separator) == 1 for separator in separators):
+        text = r"[^\"'\\{}]+".format(re.escape("".join(separators)))
+    else:
+        text = r"(?:(?!{})[^\"'\\])+".format("|".join(map(re.escape, separators)))
+    separators = builtins.sorted(separators, key=len, reverse=True)
+    return re.compile(
+        r"""
+        "([^"\\]*(?:\\.[^"\\]*)*)"    # Double quoted
+        |'([^'\\]*(?:\\.[^'\\]*)*)'   # Single quoted
+        |\\(.)                       # Escaped character
+        |({})                         # Separator
+        |({})                         # Anything else
+        """.format("|".join(map(re.escape, separators)), text),
+        re.DOTALL | re.VERBOSE,
+    )
+
+
+def _is_quoted(value):
+    return '"' in value or "'" in value or "\\" in value
+
+
+def _join_pieces(pieces):
+    # Only the unquoted whitespace around the field gets stripped
+    if pieces and not pieces[0][1]:
+        pieces[0] = (pieces[0][0].lstrip(), False)
+    if pieces and not pieces[-1][1]:
+        pieces[-1] = (pieces[-1][0].rstrip(), False)
+    return "".join(text for text, _ in pieces)
+
+
+def _split_quoted(value, separator, itemseparator=None):
+    """Yield the fields of value split on separator in a single pass.
+
+    Quotes and backslashes can be used to include the separators in a field.
+    If itemseparator is given every field is split once more on it into a
+    (key, value) tuple.
+    """
+    separators = (separator,) if itemseparator is None else (separator, itemseparator)
+    pattern = _get_quoted_pattern(*separators)
+    fields = []
+    pieces = []
+    position = 0
+    for match in pattern.finditer(value):
+        if match.start() != position:
+            break
+        position = match.end()
+        double_quoted, single_quoted, escaped, found_separator, text = match.groups()
+        if found_separator == separator:
+            fields.append(_join_pieces(pieces))
+            yield _get_field(fields, itemseparator)
+            fields = []
+            pieces = []
+        elif found_separator is not None and not fields:
+            fields.append(_join_pieces(pieces))
+            pieces = []
+        elif found_separator is not None or text is not None:
+            pieces.append((found_separator or text, False))
+        elif escaped is not None:
+            pieces.append((escaped, True))
+        else:
+            quoted = double_quoted if double_quoted is not None else single_quoted
+            if "\\" in quoted:
+                quoted = _escape_pattern.sub(r"\1", quoted)
+            pieces.append((quoted, True))
+    if position != len(value):
+        raise ValueError("Unterminated quote in {!r}".format(value))
+    fields.append(_join_pieces(pieces))
+    yield _get_field(fields, itemseparator)
+
+
+def _get_field(fields, itemseparator):
+    if itemseparator is None:
+        return fields[0]
+    if len(fields) != 2:
+        raise ValueError(
+            "Could not split {!r} with {!r}".format(fields[0], itemseparator)
+        )
+    return builtins.tuple(fields)
+
+
+def _split_items(value, separator, itemseparator):
+    strip = builtins.str.strip
+    for item in value.split(separator):
+        key, found_separator, item_value = item.partition(itemseparator)
+        if not found_separator:
+            raise ValueError(
+                "Could not split {!r} with {!r}".format(item, itemseparator)
+            )
+        yield strip(key), strip(item_value)
 
 
 def _sequence_parser(type):
+    @_compiler
+    def compile(separator, subparser, quoted):
+        strip = builtins.str.strip
+        subparser = _get_parser(subparser) if subparser is not None else None
+
+        def parse(value):
+            if quoted and _is_quoted(value):
+                items = _split_quoted(value, separator)
+            else:
+                items = map(strip, value.split(separator))
+            if subparser is not None:
+                items = map(subparser, items)
+            return type(items)
+
+        return parse
+
     @functools.wraps(type)
-    def parser(value, separator=",", subparser=None):
-        items = map(builtins.str.strip, value.split(separator))
-        if subparser is not None:
-            subparser = _get_parser(subparser)
-            items = map(subparser, items)
-        return type(items)
+    def parser(value, separator=",", subparser=None, quoted=False):
+        return compile(separator, subparser, quoted)(value)
 
+    parser.compile = compile
     return parser
 
 
@@ -56,27 +178,50 @@ frozenset = _sequence_parser(frozenset)
 # Mapping types
 
 
-def dict(value, separator=",", itemseparator="=", keyparser=None, valueparser=None):
-    items = map(builtins.str.strip, value.split(separator))
-    keys, values = zip(
-        *(map(builtins.str.strip, item.split(itemseparator)) for item in items)
-    )
-    if keyparser is not None:
-        keyparser = _get_parser(keyparser)
-        keys = map(keyparser, keys)
-    if valueparser is not None:
-        valueparser = _get_parser(valueparser)
-        values = map(valueparser, values)
-    return builtins.dict(zip(keys, values))
+def dict(
+    value,
+    separator=",",
+    itemseparator="=",
+    keyparser=None,
+    valueparser=None,
+    quoted=False,
+):
+    return dict.compile(separator, itemseparator, keyparser, valueparser, quoted)(value)
+
+
+@_compiler
+def _compile_dict(separator, itemseparator, keyparser, valueparser, quoted):
+    keyparser = _get_parser(keyparser) if keyparser is not None else None
+    valueparser = _get_parser(valueparser) if valueparser is not None else None
+
+    def parse(value):
+        if quoted and _is_quoted(value):
+            items = _split_quoted(value, separator, itemseparator)
+        else:
+            items = _split_items(value, separator, itemseparator)
+        if keyparser is not None:
+            items = ((keyparser(key), item) for key, item in items)
+        if valueparser is not None:
+            items = ((key, valueparser(item)) for key, item in items)
+        return builtins.dict(items)
+
+    return parse
+
+
+dict.compile = _compile_dict
 
 
 # Other types
 
+_true_values = builtins.frozenset(["true", "t", "yes", "y", "on", "1"])
+_false_values = builtins.frozenset(["false", "f", "no", "n", "off", "0"])
+
 
 def bool(value):
-    if value.lower() in ["true", "t", "yes", "y", "on", "1"]:
+    lowered = value.lower()
+    if lowered in _true_values:
         return True
-    elif value.lower() in ["false", "f", "no", "n", "off", "0"]:
+    elif lowered in _false_values:
         return False
     else:
         raise ValueError("Could not convert {!r} to bool".format(value))
@@ -89,3 +234,10 @@ def json(value):
     import json
 
     return json.loads(value)
+
+
+_builtin_parsers = {
+    getattr(builtins, name): parser
+    for name, parser in globals().copy().items()
+    if not name.startswith("_") and isinstance(getattr(builtins, name, None), type)
+}
@@ -0,0 +1,112 @@
+"""Preparing the settings to be shared with forked worker processes.
+
+Servers like gunicorn with --preload load the settings in the master process
+and fork the workers from it. The workers share its memory until they write to
+it, which happens whenever a reference count changes or the garbage collector
+passes over an object, leaving each worker with its own copy of the pages.
+"""
+
+import gc
+import importlib
+import linecache
+import operator
+import os
+
+from . import meta
+from .settings import LazyEnv, SettingsMeta
+from .utils import missing
+
+# Settings that Django mutates in place, such as to fill in their defaults
+MUTABLE_SETTINGS = frozenset({"DATABASES", "LOGGING"})
+
+
+def freeze(name=None, *, mutable=MUTABLE_SETTINGS, gc_freeze=True):
+    """Prepare the settings module name, DJANGO_SETTINGS_MODULE by default, to
+    be shared with forked workers. Call it right before forking.
+
+    Every setting is resolved and, apart from the mutable ones, converted to
+    immutable containers. The env lookups kept to reparse the settings, which
+    Settings.recompute needs, and the parsed source of the settings files are
+    dropped. Garbage is then collected and, if gc_freeze is true, the remaining
+    objects are moved out of the garbage collector's reach with gc.freeze.
+
+    Return the names of the settings that were converted.
+    """
+    from django.conf import settings as django_settings
+
+    name = name if name is not None else os.environ["DJANGO_SETTINGS_MODULE"]
+    module = importlib.import_module(name)
+    converted = []
+    for setting in dir(module):
+        if not setting.isupper():
+            continue
+        value = getattr(module, setting, missing)
+        if value is missing or setting in mutable:
+            continue  # Optional
+        frozen_value = freeze_value(value)
+        if frozen_value is not value:
+            module.__dict__[setting] = frozen_value
+            django_settings.__dict__.pop(setting, None)  # Django's cache
+            converted.append(setting)
+    settings = getattr(module, "SETTINGS_CLASS", None)
+    if settings is not None:  # Not frozen to a file
+        detach(type(settings))
+    meta.clear_cache()
+    linecache.clearcache()
+    gc.collect()  # The bare classes built for each class body among others
+    if gc_freeze and hasattr(gc, "freeze"):
+        gc.freeze()
+    return converted
+
+
+def freeze_value(value):
+    """Return value with the lists, sets, and dicts in it converted to tuples,
+    frozensets, and read-only dicts.
+    """
+    value_type = type(value)
+    if value_type is list or value_type is tuple:
+        items = tuple(freeze_value(item) for item in value)
+        if value_type is tuple and all(map(operator.is_, items, value)):
+            return value
+        return items
+    elif value_type is set:
+        return frozenset(freeze_value(item) for item in value)
+    elif value_type is dict:
+        return FrozenDict((key, freeze_value(item)) for key, item in value.items())
+    return value
+
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError("{!r} object is read-only".format(type(self).__name__))
+
+
+class FrozenDict(dict):
+    """A read-only dict.
+
+    It's a dict rather than a mappingproxy as code like Django's error reporter
+    checks for dicts to walk them.
+    """
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    if hasattr(dict, "__ior__"):
+        __ior__ = _readonly
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+
+def detach(cls):
+    """Drop the env lookups the Settings class cls keeps to parse its settings
+    again once they're resolved.
+    """
+    for base in cls.__mro__:
+        if not isinstance(base, SettingsMeta):
+            continue
+        vars(base).get("_recipes", {}).clear()
+        for value in vars(base).values():
+            if isinstance(value, LazyEnv) and value._value is not missing:
+                value._deferred = None
+    cls._get_caches().pop("dependency_graph", None)
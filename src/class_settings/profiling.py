@@ -0,0 +1,156 @@
+"""Opt-in profiling of how long loading the settings takes.
+
+Enable it with profile() or by setting the CLASS_SETTINGS_PROFILE environment
+variable to ``text`` or ``json``, optionally followed by ``:<path>``, to write a
+report to stderr or path at exit. Times are wall times and include the time
+spent in nested phases.
+
+While tracemalloc is tracing, the memory each Settings class holds on to once
+it's created is recorded too and reported by memory_report().
+"""
+
+import atexit
+import contextlib
+import os
+import sys
+import threading
+import time
+
+clock = time.perf_counter
+enabled = False
+
+_stats = {}
+_memory = {}
+_lock = threading.Lock()
+
+
+def profile(enable=True):
+    """Start or stop recording where the time loading the settings goes."""
+    global enabled
+    enabled = enable
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+        _memory.clear()
+
+
+def record(phase, name, elapsed):
+    key = (phase, name)
+    with _lock:
+        stats = _stats.get(key)
+        if stats is None:
+            _stats[key] = [1, elapsed]
+        else:
+            stats[0] += 1
+            stats[1] += elapsed
+
+
+@contextlib.contextmanager
+def timed(phase, name):
+    if not enabled:
+        yield
+        return
+    start = clock()
+    try:
+        yield
+    finally:
+        record(phase, name, clock() - start)
+
+
+def get_traced_memory():
+    """Return the memory traced by tracemalloc, None if it isn't tracing."""
+    import tracemalloc
+
+    if not tracemalloc.is_tracing():
+        return None
+    return tracemalloc.get_traced_memory()[0]
+
+
+def record_memory(name, size):
+    with _lock:
+        _memory[name] = _memory.get(name, 0) + size
+
+
+def get_stats():
+    """Return the recorded stats, slowest first."""
+    with _lock:
+        items = [(phase, name, *stats) for (phase, name), stats in _stats.items()]
+    items.sort(key=lambda item: item[3], reverse=True)
+    return [
+        {"phase": phase, "name": name, "calls": calls, "time": total}
+        for phase, name, calls, total in items
+    ]
+
+
+def report(format="text"):
+    """Return a report of the recorded stats as text or JSON."""
+    stats = get_stats()
+    if format == "json":
+        import json
+
+        return json.dumps(stats, indent=2)
+    if format != "text":
+        raise ValueError("Unknown report format {!r}".format(format))
+    lines = [
+        "{:<8} {:<50} {:>8} {:>12} {:>14}".format(
+            "phase", "name", "calls", "total (ms)", "per call (us)"
+        )
+    ]
+    for stat in stats:
+        lines.append(
+            "{:<8} {:<50} {:>8} {:>12.3f} {:>14.3f}".format(
+                stat["phase"],
+                stat["name"],
+                stat["calls"],
+                stat["time"] * 1e3,
+                stat["time"] / stat["calls"] * 1e6,
+            )
+        )
+    return "\n".join(lines) + "\n"
+
+
+def get_memory_stats():
+    """Return the recorded memory of each Settings class, largest first."""
+    with _lock:
+        items = sorted(_memory.items(), key=lambda item: item[1], reverse=True)
+    return [{"name": name, "size": size} for name, size in items]
+
+
+def memory_report(format="text"):
+    """Return a report of the recorded memory as text or JSON."""
+    stats = get_memory_stats()
+    if format == "json":
+        import json
+
+        return json.dumps(stats, indent=2)
+    if format != "text":
+        raise ValueError("Unknown report format {!r}".format(format))
+    lines = ["{:<60} {:>12}".format("class", "size (KiB)")]
+    for stat in stats:
+        lines.append("{:<60} {:>12.1f}".format(stat["name"], stat["size"] / 1024))
+    return "\n".join(lines) + "\n"
+
+
+def write_report(format="text", path=None):
+    output = report(format)
+    if path:
+        with open(path, "w") as file:
+            file.write(output)
+    else:
+        sys.stderr.write(output)
+
+
+def _enable_from_environ():
+    value = os.environ.get("CLASS_SETTINGS_PROFILE")
+    if not value:
+        return
+    format, _, path = value.partition(":")
+    if format not in {"text", "json"}:
+        format = "text"
+    profile()
+    atexit.register(write_report, format, path or None)
+
+
+_enable_from_environ()
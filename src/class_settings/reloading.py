@@ -0,0 +1,221 @@
+"""Reloading the settings when the files they're read from change.
+
+The .env files and the files read with env.file or the _FILE fallback that the
+settings were read from are watched, using inotify where available and polling
+otherwise. On a change the Settings class is reevaluated in the background and
+swapped in, after which Django's setting_changed signal is sent for every
+setting whose value changed.
+"""
+
+import ctypes
+import ctypes.util
+import importlib
+import logging
+import os
+import select
+import sys
+import threading
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+
+from . import frozen
+from .env import Recorder
+from .importers import SettingsModule
+
+logger = logging.getLogger(__name__)
+
+clock = time.monotonic
+
+# IN_MODIFY, IN_ATTRIB, IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE,
+# IN_DELETE, and IN_DELETE_SELF
+_inotify_mask = 0x2 | 0x4 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200 | 0x400
+
+
+class Inotify:
+    """Waits for changes in directories with inotify."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._libc = libc
+        self._fd = fd
+        self._directories = set()
+        self._complete = True
+
+    def watch(self, directories):
+        self._complete = True
+        for directory in directories:
+            if directory in self._directories:
+                continue
+            path = os.fsencode(directory)
+            if self._libc.inotify_add_watch(self._fd, path, _inotify_mask) < 0:
+                self._complete = False  # Missing, check it on every wait
+            else:
+                self._directories.add(directory)
+
+    def wait(self, timeout):
+        """Return whether anything might have changed within timeout."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return not self._complete
+        try:
+            while os.read(self._fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        os.close(self._fd)
+
+
+class Poller:
+    """Assumes directories change on every interval."""
+
+    def __init__(self, stop):
+        self._stop = stop
+
+    def watch(self, directories):
+        pass
+
+    def wait(self, timeout):
+        return not self._stop.wait(timeout)
+
+    def close(self):
+        pass
+
+
+class Watcher:
+    """Reloads the settings module name, formatted as module:class, when the
+    files it's read from change.
+
+    Changes are checked for every interval seconds and reloads happen at most
+    once every min_interval seconds.
+    """
+
+    def __init__(self, name, *, interval=1.0, min_interval=5.0, inotify=True):
+        self.name = name
+        self.interval = interval
+        self.min_interval = min_interval
+        self.inotify = inotify
+        self.signatures = {}
+        self._last_reload = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.get_module()  # Fail now rather than in the thread
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="class_settings.reloading", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _get_notifier(self):
+        if self.inotify:
+            try:
+                return Inotify()
+            except (OSError, AttributeError):  # Not on Linux
+                pass
+        return Poller(self._stop)
+
+    def _run(self):
+        notifier = self._get_notifier()
+        try:
+            self._last_reload = clock()
+            self.signatures = self.get_signatures(self.get_module()._recorder)
+            notifier.watch(self.get_directories())
+            while not self._stop.is_set():
+                if not notifier.wait(self.interval) or not self.is_stale():
+                    continue
+                delay = self._last_reload + self.min_interval - clock()
+                if delay > 0 and self._stop.wait(delay):
+                    break
+                self.reload()
+                notifier.watch(self.get_directories())
+        finally:
+            notifier.close()
+
+    def get_module(self):
+        """Return the settings module to reload."""
+        module = sys.modules.get(self.name)
+        if module is None:
+            raise ImproperlyConfigured(
+                "The settings module {!r} hasn't been imported".format(self.name)
+            )
+        if not isinstance(module, SettingsModule):
+            raise ImproperlyConfigured(
+                "The settings module {!r} can't be reloaded, frozen settings are "
+                "read from DJANGO_SETTINGS_FROZEN or CLASS_SETTINGS_CACHE_DIR "
+                "instead of the environment".format(self.name)
+            )
+        return module
+
+    def get_signatures(self, recorder):
+        return {file: frozen.get_signature(file) for file in recorder.files}
+
+    def get_directories(self):
+        # Watch the directories to catch files being replaced too
+        return {os.path.dirname(file) for file in self.signatures}
+
+    def is_stale(self):
+        """Return whether any of the files changed since the last reload."""
+        return any(
+            frozen.get_signature(file) != signature
+            for file, signature in self.signatures.items()
+        )
+
+    def reload(self):
+        """Reevaluate the Settings class and swap its settings in.
+
+        Return the names of the settings that changed, errors are logged and
+        leave the settings as they were.
+        """
+        from django.core.signals import setting_changed
+
+        self._last_reload = clock()
+        module = self.get_module()
+        module_name, _, class_name = self.name.rpartition(":")
+        try:
+            with Recorder() as recorder:
+                # The Envs the settings were read from, such as one that read
+                # its .env files before the settings module was imported
+                for env in module._recorder.envs:
+                    env.reload_env()
+                settings_module = importlib.reload(sys.modules[module_name])
+                settings = getattr(settings_module, class_name)()
+        except Exception:
+            logger.exception("Reloading %s failed", self.name)
+            return []
+        self.signatures = self.get_signatures(recorder)
+        changed = module.reload(settings, recorder)
+        for name in changed:
+            setting_changed.send(
+                sender=type(settings),
+                setting=name,
+                value=getattr(module, name, None),
+                enter=False,
+            )
+        return changed
+
+
+def watch(name=None, **kwargs):
+    """Start reloading the settings module name, DJANGO_SETTINGS_MODULE by
+    default, when the files it's read from change.
+
+    Each process has to start its own watcher, with gunicorn's --preload
+    that's in the post_fork hook. Return the started Watcher.
+    """
+    name = name if name is not None else os.environ["DJANGO_SETTINGS_MODULE"]
+    watcher = Watcher(name, **kwargs)
+    watcher.start()
+    return watcher
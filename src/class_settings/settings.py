@@ -1,35 +1,116 @@
-import __future__
-
-import ast
 import collections
-import copy
-import inspect
 import sys
-import textwrap
-import tokenize
+import types
 
 from django.core.exceptions import ImproperlyConfigured
 
-from .env import DeferredEnv
+from . import cow, interning, profiling
+from .env import DeferredEnv, pop_namespace, push_namespace
+from .meta import get_body_code, get_meta
 from .options import Options
 from .utils import missing
 
+# The most threads to resolve batched settings with
+MAX_WORKERS = 4
+
+
+class LazyEnv:
+    """A setting that's only parsed from the environment on first access."""
+
+    __slots__ = ("_name", "_deferred", "_value")
+
+    def __init__(self, name, deferred):
+        self._name = name
+        self._deferred = deferred
+        self._value = missing
+
+    def __get__(self, instance, owner=None):
+        return self.resolve()
+
+    def resolve(self):
+        value = self._value
+        if value is missing:
+            try:
+                value = self._deferred._parse(self._name)
+            except ImproperlyConfigured:
+                if self._deferred._optional:
+                    raise AttributeError(self._name) from None
+                raise
+            self._value = value
+        return value
+
 
 class SettingsDict(collections.UserDict):
-    def __init__(self, *, options, bare_cls):
+    def __init__(self, *, options, bases):
         super().__init__()
         self.options = options
-        self._bare_cls = bare_cls
+        self._bases = bases
+        self._bare_cls = None
+        self._traced_memory = None
+        self._batched = {}
+        # The env lookups since the last assignment and the value they returned
+        self._reads = []
+        self.dependencies = {}
+        self.recipes = {}
+
+    def __getitem__(self, key):
+        if key in self._batched:
+            self.resolve_batched()
+        value = super().__getitem__(key)
+        if type(value) is LazyEnv:  # Read further down the class body
+            try:
+                return value.resolve()
+            except AttributeError:  # Optional
+                raise KeyError(key) from None
+        return value
 
     def __missing__(self, key):
         if self.options.inject_settings and key.isupper():
-            value = getattr(self._bare_cls, key, missing)
+            value = getattr(self.get_bare_cls(), key, missing)
             if value is not missing:
-                return copy.deepcopy(value)
+                return cow.inject(value)
         raise KeyError(key)
 
+    def get_bare_cls(self):
+        """Return a class with the bases of the class being created, to look up
+        what it inherits. It's only built when needed.
+        """
+        if self._bare_cls is None:
+            namespace = SettingsDict(options=self.options, bases=())
+            self._bare_cls = SettingsMeta("<Bare>", self._bases, namespace)
+        return self._bare_cls
+
+    def set_meta(self, meta):
+        """Set the options from the Meta class meta, the inherited one if None."""
+        if meta is None and self._bases:
+            # Only multiple inheritance needs a class to find the inherited Meta
+            bases = self._bases
+            inherited = bases[0] if len(bases) == 1 else self.get_bare_cls()
+            meta = getattr(inherited, "Meta", None)
+        self.options = Options(meta)
+        if self._bare_cls is not None:
+            self._bare_cls._options = self.options
+
+    def add_read(self, recipe, value):
+        """Record that the env lookup recipe returned value."""
+        self._reads.append((recipe, value))
+
     def __setitem__(self, key, value):
+        self._batched.pop(key, None)
+        reads = self._reads
         if isinstance(value, DeferredEnv):
+            reads.append((value, missing))
+        if reads:
+            self._reads = []
+            if key.isupper():
+                self._set_dependencies(key, reads, value)
+        elif key in self.dependencies:
+            self._set_dependencies(key, reads, value)
+        if isinstance(value, DeferredEnv) and self.options.lazy:
+            value = LazyEnv(key, value)
+        elif isinstance(value, DeferredEnv) and value._batched:
+            self._batched[key] = value  # Resolved by resolve_batched
+        elif isinstance(value, DeferredEnv):
             try:
                 value = value._parse(key)
             except ImproperlyConfigured:
@@ -38,54 +119,270 @@ class SettingsDict(collections.UserDict):
                 raise
         super().__setitem__(key, value)
 
+    def __delitem__(self, key):
+        self._batched.pop(key, None)
+        self.dependencies.pop(key, None)
+        self.recipes.pop(key, None)
+        super().__delitem__(key)
+
+    def _set_dependencies(self, key, reads, value):
+        if isinstance(value, DeferredEnv):
+            recipe = value
+        elif len(reads) == 1 and reads[0][1] is value:
+            recipe = reads[0][0]
+        else:
+            recipe = None  # Only values straight from a lookup can be reparsed
+        names = {name for read, _ in reads for name in read._get_names(key)}
+        if names:
+            self.dependencies[key] = interning.intern(frozenset(names))
+        else:
+            self.dependencies.pop(key, None)
+        if recipe is not None:
+            self.recipes[key] = recipe
+        else:
+            self.recipes.pop(key, None)
+
+    def resolve_batched(self):
+        """Resolve the batched settings, such as the ones read from files,
+        concurrently.
+        """
+        batched = self._batched
+        if not batched:
+            return
+        self._batched = {}
+        items = list(batched.items())
+        workers = min(len(items), MAX_WORKERS)
+        if workers == 1:
+            results = self._resolve_all(items)
+        else:
+            import concurrent.futures
+
+            # Hand out the settings in chunks to keep the thread overhead down
+            with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+                futures = [
+                    executor.submit(self._resolve_all, items[i::workers])
+                    for i in range(workers)
+                ]
+            results = [result for future in futures for result in future.result()]
+        for key, value in results:
+            if value is missing:
+                del self.data[key]  # Optional
+            else:
+                self.data[key] = value
+
+    @staticmethod
+    def _resolve_all(items):
+        results = []
+        for key, deferred in items:
+            try:
+                value = deferred._parse(key)
+            except ImproperlyConfigured:
+                if not deferred._optional:
+                    raise
+                value = missing
+            results.append((key, value))
+        return results
+
+
+def build_namespace(bases, attrs, *, meta=None, module=None):
+    """Return the namespace of a Settings class with bases whose body assigns
+    attrs, as SettingsMeta.__prepare__ and the class body would.
+
+    attrs is a mapping or a callable taking the namespace and returning one, see
+    Settings.create. The Meta class is meta, otherwise the one in attrs if it's a
+    mapping, otherwise the inherited one.
+    """
+    namespace = SettingsDict(options=None, bases=bases)
+    if profiling.enabled:
+        namespace._traced_memory = profiling.get_traced_memory()
+    if meta is None and not callable(attrs):
+        meta = attrs.get("Meta")
+    namespace.set_meta(meta)
+    if meta is not None:
+        namespace.data["Meta"] = meta
+    if module is not None:
+        namespace.data["__module__"] = module
+    if callable(attrs):
+        push_namespace(namespace, None)
+        try:
+            attrs = attrs(namespace)
+        finally:
+            pop_namespace(namespace)
+        if attrs is None:
+            attrs = {}
+    # The lookups made since the callable last assigned to the namespace
+    reads = get_reads_by_key(namespace._reads, attrs)
+    namespace._reads = []
+    data = namespace.data
+    for key, value in attrs.items():
+        if key in reads:
+            namespace._reads = reads[key]
+            namespace[key] = value
+        elif isinstance(value, DeferredEnv) or key in data:
+            namespace[key] = value
+        else:
+            data[key] = value  # Nothing to track or parse
+    namespace._reads = []
+    return namespace
+
+
+def get_reads_by_key(reads, attrs):
+    """Return a mapping of the keys of attrs to the lookups in reads that
+    returned their value.
+
+    As in a class body, where a lookup's name defaults to the setting's, a
+    lookup is the setting's own if it's named after it. It's only attributed if
+    its value is returned as is, so it can be reparsed.
+    """
+    reads_by_key = {}
+    for recipe, value in reads:
+        key = recipe._name
+        if attrs.get(key, missing) is value:
+            # Repeated lookups of the setting are interchangeable
+            reads_by_key[key] = [(recipe, value)]
+    return reads_by_key
+
 
 class SettingsMeta(type):
     @classmethod
     def __prepare__(meta, name, bases):
-        bare_cls = meta("<Bare>", bases, SettingsDict(options=None, bare_cls=None))
-
+        namespace = SettingsDict(options=None, bases=bases)
         frame = sys._getframe(1)
-        filename = inspect.getsourcefile(frame)
-        with tokenize.open(filename) as file:
-            lines = file.readlines()[frame.f_lineno - 1 :]
-        source = "".join(inspect.getblock(lines))
-        source = textwrap.dedent(source.expandtabs(tabsize=8))
-
-        cls_node = ast.parse(source).body[0]
-        for node in reversed(list(ast.iter_child_nodes(cls_node))):
-            if isinstance(node, ast.ClassDef) and node.name == "Meta":
-                cf_mask = sum(
-                    getattr(__future__, feature).compiler_flag
-                    for feature in __future__.all_feature_names
-                )
-                code = compile(
-                    ast.Module(body=[node], type_ignores=[]),
-                    filename="<meta>",
-                    mode="exec",
-                    flags=frame.f_code.co_flags & cf_mask,
-                    dont_inherit=True,
-                )
-                globals = frame.f_globals
-                locals = {}
-                exec(code, globals, locals)
-                meta = locals["Meta"]
-                break
+        if profiling.enabled:
+            namespace._traced_memory = profiling.get_traced_memory()
+            module = frame.f_globals.get("__name__")
+            with profiling.timed("meta", "{}.{}".format(module, name)):
+                meta = get_meta(frame, name)
         else:
-            meta = getattr(bare_cls, "Meta", None)
-        options = Options(meta)
-        bare_cls._options = options
-        return SettingsDict(options=options, bare_cls=bare_cls)
+            meta = get_meta(frame, name)
+        namespace.set_meta(meta)
+        body_code = get_body_code(frame.f_code, name, frame.f_lineno)
+        if body_code is not None:  # Otherwise not run by a class statement
+            push_namespace(namespace, body_code, frame)
+        return namespace
 
     def __new__(meta, name, bases, namespace):
-        if "Meta" in namespace and not inspect.isclass(namespace["Meta"]):
+        if not isinstance(namespace, SettingsDict):
+            # Called directly rather than through a class statement
+            module = sys._getframe(1).f_globals.get("__name__")
+            namespace = build_namespace(bases, namespace, module=module)
+        pop_namespace(namespace)
+        namespace.resolve_batched()
+        if "Meta" in namespace and not isinstance(namespace["Meta"], type):
             raise TypeError("{}.Meta has to be a class".format(name))
+        if namespace.options is not None and namespace.options.inject_settings:
+            memo = {}  # Settings aliasing each other keep doing so
+            for key, value in namespace.data.items():
+                namespace.data[key] = cow.resolve(value, memo)
+        for key, value in namespace.data.items():
+            if key.isupper():
+                namespace.data[key] = interning.intern(value)
         namespace["_options"] = namespace.options
-        return super().__new__(meta, name, bases, namespace.data)
+        # Most classes don't read the environment, leave them without the dicts
+        if namespace.dependencies:
+            namespace["_dependencies"] = namespace.dependencies
+        if namespace.recipes:
+            namespace["_recipes"] = namespace.recipes
+        cls = super().__new__(meta, name, bases, namespace.data)
+        if namespace._traced_memory is not None:
+            traced_memory = profiling.get_traced_memory()
+            if traced_memory is not None:  # Unless tracemalloc was stopped
+                profiling.record_memory(
+                    "{}.{}".format(namespace.data.get("__module__"), name),
+                    traced_memory - namespace._traced_memory,
+                )
+        return cls
 
-    def __dir__(cls):
+    def __setattr__(cls, name, value):
+        super().__setattr__(name, value)
+        cls._clear_caches()
+
+    def __delattr__(cls, name):
+        super().__delattr__(name)
+        cls._clear_caches()
+
+    def _clear_caches(cls):
+        subclasses = [cls]
+        while subclasses:
+            subclass = subclasses.pop()
+            if "_caches" in subclass.__dict__:
+                type.__delattr__(subclass, "_caches")
+            subclasses += type.__subclasses__(subclass)
+
+    def _get_caches(cls):
+        try:
+            return cls.__dict__["_caches"]
+        except KeyError:
+            caches = {}
+            type.__setattr__(cls, "_caches", caches)
+            return caches
+
+    def _get_settings(cls, *, plain=False):
+        """Return a read-only mapping of all the settings, defaults included.
+
+        Descriptors, such as properties, are included unresolved unless plain is
+        true, in which case they are left out.
+        """
+        caches = cls._get_caches()
+        try:
+            return caches["plain_settings" if plain else "settings"]
+        except KeyError:
+            pass
+        settings = {}
         default_settings = cls._options.default_settings
-        default_dir = [s for s in dir(default_settings) if s.isupper()]
-        return {*super().__dir__(), *default_dir}
+        for name in dir(default_settings):
+            if name.isupper():
+                settings[name] = getattr(default_settings, name)
+        for base in reversed(cls.__mro__):
+            for name, value in vars(base).items():
+                if name.isupper():
+                    settings[name] = value
+        plain_settings = {
+            name: value
+            for name, value in settings.items()
+            if not hasattr(type(value), "__get__")
+        }
+        caches["settings"] = types.MappingProxyType(settings)
+        caches["plain_settings"] = types.MappingProxyType(plain_settings)
+        return caches["plain_settings" if plain else "settings"]
+
+    def _get_dependency_graph(cls):
+        """Return the mappings of the settings to the environment variables they
+        read and to the lookups that can reparse them.
+        """
+        caches = cls._get_caches()
+        try:
+            return caches["dependency_graph"]
+        except KeyError:
+            pass
+        dependencies = {}
+        recipes = {}
+        for base in reversed(cls.__mro__):
+            base_dependencies = vars(base).get("_dependencies", {})
+            base_recipes = vars(base).get("_recipes", {})
+            # Unset optional settings only show up in the dependencies
+            for name in {*vars(base), *base_dependencies}:
+                if not name.isupper():
+                    continue
+                dependencies.pop(name, None)
+                recipes.pop(name, None)
+                if name in base_dependencies:
+                    dependencies[name] = base_dependencies[name]
+                if name in base_recipes:
+                    recipes[name] = base_recipes[name]
+        caches["dependency_graph"] = (dependencies, recipes)
+        return caches["dependency_graph"]
+
+    def __dir__(cls):
+        caches = cls._get_caches()
+        try:
+            return caches["dir"]
+        except KeyError:
+            pass
+        names = {*super().__dir__(), *cls._get_settings()}
+        names.discard("_caches")
+        caches["dir"] = frozenset(names)
+        return caches["dir"]
 
     def __getattr__(cls, name):
         if not name.isupper():
@@ -98,9 +395,10 @@ class SettingsMeta(type):
 
 class Settings(metaclass=SettingsMeta):
     def __dir__(self):
-        default_settings = self._options.default_settings
-        default_dir = [s for s in dir(default_settings) if s.isupper()]
-        return {*super().__dir__(), *default_dir}
+        names = SettingsMeta.__dir__(type(self))
+        if vars(self):
+            return names.union(vars(self))
+        return names
 
     def __getattr__(self, name):
         if not name.isupper():
@@ -110,6 +408,140 @@ class Settings(metaclass=SettingsMeta):
         default_settings = self._options.default_settings
         return getattr(default_settings, name)
 
+    @classmethod
+    def create(cls, name, attrs=(), *, meta=None, module=None):
+        """Return a subclass named name with the attributes attrs, without the
+        source lookups of a class statement.
+
+        attrs is a mapping or a callable taking the class namespace and
+        returning one. Env lookups made in the callable act as in a class body,
+        apart from being parsed right away even with the lazy option, and, with
+        inject_settings, inherited settings can be looked up in the
+        namespace. Settings the callable assigns to the namespace are tracked
+        like in a class body. For the returned ones, lookups without a name are
+        parsed and tracked per setting, and lookups with one are tracked if
+        they're named after the setting they return the value of as is. meta
+        is the Meta class, the inherited one by default. module sets
+        __module__, the caller's module by default.
+        """
+        if module is None:
+            module = sys._getframe(1).f_globals.get("__name__")
+        if not callable(attrs):
+            attrs = dict(attrs)
+        namespace = build_namespace((cls,), attrs, meta=meta, module=module)
+        return type(cls)(name, (cls,), namespace)
+
+    @classmethod
+    def validate(cls):
+        """Resolve all the lazy settings, raising all the errors at once."""
+        errors = []
+        seen = set()
+        for base in cls.__mro__:
+            for name, value in vars(base).items():
+                if name in seen:
+                    continue
+                seen.add(name)
+                if not isinstance(value, LazyEnv):
+                    continue
+                try:
+                    value.resolve()
+                except AttributeError:
+                    pass  # Optional
+                except Exception as exc:
+                    errors.append("{}: {}".format(name, exc))
+        if errors:
+            raise ImproperlyConfigured(
+                "Invalid settings:\n{}".format("\n".join(errors))
+            )
+
+    @classmethod
+    def get_dependencies(cls):
+        """Return a mapping of the settings to the environment variables they
+        read while the class bodies ran.
+
+        Only the lookups made while a setting's own assignment runs are tracked,
+        not the ones made through other variables.
+        """
+        return dict(cls._get_dependency_graph()[0])
+
+    @classmethod
+    def get_dependents(cls, *names):
+        """Return the names of the settings that read any of the environment
+        variables names.
+        """
+        names = set(names)
+        return {
+            setting
+            for setting, dependencies in cls._get_dependency_graph()[0].items()
+            if not names.isdisjoint(dependencies)
+        }
+
+    def recompute(self, changed):
+        """Reparse the settings that read any of the changed environment
+        variables, overriding them on the instance.
+
+        Return a mapping of the settings whose values changed to their old and
+        new values, with None for unset optional settings. Optional settings
+        whose variables were removed are unset on the instance, which falls back
+        to Django's default, or None if the class sets them and there's none.
+        Settings that don't come straight from an env lookup, such as dicts with
+        env lookups in them, can't be reparsed on their own and raise a
+        ValueError. The settings module serving the instance, if any, and
+        django.conf.settings are updated too.
+        """
+        settings = sorted(type(self).get_dependents(*changed))
+        recipes = type(self)._get_dependency_graph()[1]
+        unparsable = [setting for setting in settings if setting not in recipes]
+        if unparsable:
+            raise ValueError(
+                "{} can't be reparsed on their own".format(", ".join(unparsable))
+            )
+        values = {}
+        for setting in settings:
+            recipe = recipes[setting]
+            try:
+                values[setting] = recipe._parse(setting)
+            except ImproperlyConfigured:
+                if not recipe._optional:
+                    raise
+                values[setting] = missing
+        diff = {}
+        for setting, value in values.items():
+            old_value = getattr(self, setting, missing)
+            if value is missing:
+                if old_value is missing or not self.is_overridden(setting):
+                    continue
+                self.__dict__.pop(setting, None)
+                if self.is_overridden(setting):  # Set by the class
+                    default_settings = self._options.default_settings
+                    setattr(self, setting, getattr(default_settings, setting, None))
+                diff[setting] = (old_value, None)
+            elif old_value is missing or old_value != value:
+                setattr(self, setting, value)
+                diff[setting] = (old_value if old_value is not missing else None, value)
+        module = self.__dict__.get("_module")
+        if diff and module is not None:
+            module.reload(self, module._recorder)
+        return diff
+
+    def items(self):
+        """Return an iterator of the (name, value) pairs of all the settings."""
+        instance_settings = {
+            name: value for name, value in vars(self).items() if name.isupper()
+        }
+        plain_settings = type(self)._get_settings(plain=True)
+        for name in type(self)._get_settings():
+            if name in instance_settings:
+                yield name, instance_settings.pop(name)
+            elif name in plain_settings:
+                yield name, plain_settings[name]
+            else:
+                try:
+                    yield name, getattr(self, name)
+                except AttributeError:
+                    pass  # Optional
+        yield from instance_settings.items()
+
     def is_overridden(self, setting):
         try:
             self.__getattribute__(setting)  # Avoids __getattr__
@@ -1,3 +1,22 @@
+import threading
+
+try:
+    from contextvars import ContextVar
+except ImportError:  # Python < 3.7
+
+    class ContextVar:
+        def __init__(self, name, *, default):
+            self.name = name
+            self._default = default
+            self._local = threading.local()
+
+        def get(self):
+            return getattr(self._local, "value", self._default)
+
+        def set(self, value):
+            self._local.value = value
+
+
 class Missing:
     def __bool__(self):
         return False
@@ -171,6 +171,16 @@ def test(c, all=False, cov=False, cov_report=True):
         c.run("coverage report")
 
 
+@task(iterable=["pattern"])
+def bench(c, pattern, save="", compare="", threshold=0.1):
+    args = [*pattern]
+    if save:
+        args.append(f"--save {save}")
+    if compare:
+        args.append(f"--compare {compare} --threshold {threshold}")
+    c.run(f"python -m benchmarks {' '.join(args)}", pty=True)
+
+
 @task
 @check_git
 def backport(c, commit):
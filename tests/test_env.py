@@ -1,6 +1,14 @@
+import json
+import os
+import tracemalloc
+import types
+
 import pytest
+from django.core.exceptions import ImproperlyConfigured
 
-from class_settings import Env, Settings
+from class_settings import Env, Settings, envfiles, profiling
+from class_settings.cache import ParserCache
+from class_settings.env import Snapshot, _namespaces
 
 
 @pytest.fixture
@@ -102,6 +110,51 @@ class TestEnv:
         assert settings.SECRET_KEY == "test"
         assert settings.CUSTOM == "1"
 
+    @pytest.mark.parametrize("env", [{"DJANGO_SECRET_KEY": "test"}], indirect=True)
+    def test_env_nested(self, env):
+        def get_secret_key():
+            return env("SECRET_KEY")
+
+        class TestSettings(Settings):
+            SECRET_KEY = get_secret_key()
+
+        settings = TestSettings()
+
+        assert settings.SECRET_KEY == "test"
+
+    @pytest.mark.parametrize("env", [{}], indirect=True)
+    def test_env_outside(self, env):
+        with pytest.raises(ZeroDivisionError):
+
+            class TestSettings(Settings):
+                SECRET_KEY = 1 / 0
+
+        with pytest.raises(TypeError):
+            env()
+
+    @pytest.mark.parametrize("env", [{"DJANGO_SECRET_KEY": "test"}], indirect=True)
+    def test_env_after_raise(self, env):
+        def define():
+            class TestSettings(Settings):
+                SECRET_KEY = env("SECRET_KEY")
+                DEBUG = 1 / 0
+
+        for _ in range(3):
+            with pytest.raises(ZeroDivisionError):
+                define()
+
+        assert all(
+            not isinstance(item, types.FrameType)
+            for entry in _namespaces.get()
+            for item in entry
+        )
+
+        class TestSettings(Settings):
+            SECRET_KEY = env("SECRET_KEY")
+
+        assert TestSettings().SECRET_KEY == "test"
+        assert _namespaces.get() == ()
+
     @pytest.mark.parametrize("env", [{"DJANGO_CUSTOM": "custom"}], indirect=True)
     def test_env_parser(self, env):
         @env.parser
@@ -188,6 +241,28 @@ class TestEnvParsers:
         assert settings.LIST == [1, 2]
         assert settings.TUPLE == (1, 2)
 
+    @pytest.mark.parametrize(
+        "env",
+        [{"DJANGO_LIST": r""" "test, abc" , 'a"b', a\,b """, "DJANGO_TUPLE": '"1"'}],
+        indirect=True,
+    )
+    def test_sequence_quoted(self, env):
+        class TestSettings(Settings):
+            LIST = env.list("LIST", quoted=True)
+            TUPLE = env.tuple("TUPLE", subparser=int, quoted=True)
+
+        settings = TestSettings()
+
+        assert settings.LIST == ["test, abc", 'a"b', "a,b"]
+        assert settings.TUPLE == (1,)
+
+    @pytest.mark.parametrize("env", [{"DJANGO_LIST": '"test, abc'}], indirect=True)
+    def test_sequence_quoted_unterminated(self, env):
+        with pytest.raises(ValueError):
+
+            class TestSettings(Settings):
+                LIST = env.list("LIST", quoted=True)
+
     @pytest.mark.parametrize("env", [{"DJANGO_STR": "test"}], indirect=True)
     def test_text_sequence(self, env):
         class TestSettings(Settings):
@@ -286,6 +361,17 @@ class TestEnvParsers:
 
         assert settings.DICT == {1: 1.5, 2: 2.5}
 
+    @pytest.mark.parametrize(
+        "env", [{"DJANGO_DICT": 'test = "a, b", "c=d" = e=f'}], indirect=True
+    )
+    def test_mapping_quoted(self, env):
+        class TestSettings(Settings):
+            DICT = env.dict("DICT", quoted=True)
+
+        settings = TestSettings()
+
+        assert settings.DICT == {"test": "a, b", "c=d": "e=f"}
+
     @pytest.mark.parametrize(
         "env",
         [
@@ -352,3 +438,551 @@ class TestEnvMeta:
 
         assert settings.SECRET_KEY == "test"
         assert settings.CUSTOM == "1"
+
+
+class TestEnvSource:
+    @pytest.mark.parametrize("env", [{"DJANGO_CUSTOM": "environ"}], indirect=True)
+    def test_mapping(self, env):
+        env = Env(source={"DJANGO_SECRET_KEY": "test"})
+
+        class TestSettings(Settings):
+            SECRET_KEY = env()
+            CUSTOM = env(default="custom")
+
+        settings = TestSettings()
+
+        assert settings.SECRET_KEY == "test"
+        assert settings.CUSTOM == "custom"
+
+    @pytest.mark.parametrize(
+        "env", [{"DJANGO_SECRET_KEY": "environ", "DJANGO_CUSTOM": "1"}], indirect=True
+    )
+    def test_chain(self, env):
+        env = Env(source=[{"DJANGO_SECRET_KEY": "test"}, None])
+
+        class TestSettings(Settings):
+            SECRET_KEY = env()
+            CUSTOM = env.int()
+
+        settings = TestSettings()
+
+        assert settings.SECRET_KEY == "test"
+        assert settings.CUSTOM == 1
+
+    @pytest.mark.parametrize("env", [{"DJANGO_SECRET_KEY": "test"}], indirect=True)
+    def test_snapshot(self, env, monkeypatch):
+        snapshot = Snapshot()
+        env = Env(source=snapshot)
+        monkeypatch.setenv("DJANGO_SECRET_KEY", "changed")
+        monkeypatch.setenv("DJANGO_DEBUG", "true")
+
+        assert env("DJANGO_SECRET_KEY") == "test"
+        snapshot.refresh()
+        assert env("DJANGO_SECRET_KEY") == "changed"
+        assert env.bool("DJANGO_DEBUG") is True
+        monkeypatch.delenv("DJANGO_DEBUG")
+        snapshot.refresh()
+        assert "DJANGO_DEBUG" not in snapshot
+
+    @pytest.mark.parametrize("env", [{"DJANGO_SECRET_KEY": "environ"}], indirect=True)
+    def test_using(self, env):
+        class TestSettings(Settings):
+            with env.using({"DJANGO_SECRET_KEY": "test"}):
+                SECRET_KEY = env()
+            CUSTOM = env("SECRET_KEY")
+
+        settings = TestSettings()
+
+        assert settings.SECRET_KEY == "test"
+        assert settings.CUSTOM == "environ"
+
+
+class TestEnvReadEnv:
+    def test_parse(self, monkeypatch):
+        monkeypatch.setenv("DJANGO_HOST", "example.com")
+        text = """
+# Comment
+PLAIN=value # comment
+export EXPORTED = spaced value
+HASH=a#b
+EMPTY=
+SINGLE='${HOST}\\n # not a comment'
+DOUBLE="line\\n\\"quoted\\""
+MULTILINE="first
+second"
+URL=https://${DJANGO_HOST}/${PLAIN}
+DEFAULT=${MISSING:-fallback}
+INVALID LINE
+"""
+
+        assert envfiles.parse(text) == {
+            "PLAIN": "value",
+            "EXPORTED": "spaced value",
+            "HASH": "a#b",
+            "EMPTY": "",
+            "SINGLE": "${HOST}\\n # not a comment",
+            "DOUBLE": 'line\n"quoted"',
+            "MULTILINE": "first\nsecond",
+            "URL": "https://example.com/value",
+            "DEFAULT": "fallback",
+        }
+
+    @pytest.mark.parametrize(
+        "env", [{"DJANGO_SECRET_KEY": "environ", "DJANGO_CUSTOM": "1"}], indirect=True
+    )
+    def test_read_env(self, env, tmp_path, monkeypatch):
+        (tmp_path / ".env").write_text("DJANGO_SECRET_KEY=base\nDJANGO_DEBUG=1\n")
+        (tmp_path / ".env.local").write_text("DJANGO_SECRET_KEY=local\n")
+        monkeypatch.chdir(tmp_path)
+        env.read_env(".env", ".env.missing", ".env.local")
+
+        class TestSettings(Settings):
+            SECRET_KEY = env()
+            DEBUG = env.bool()
+            CUSTOM = env.int()
+
+        settings = TestSettings()
+
+        assert settings.SECRET_KEY == "local"
+        assert settings.DEBUG is True
+        assert settings.CUSTOM == 1
+        assert os.environ["DJANGO_SECRET_KEY"] == "environ"
+        assert "DJANGO_DEBUG" not in os.environ
+
+    @pytest.mark.parametrize("env", [{"DJANGO_SECRET_KEY": "environ"}], indirect=True)
+    def test_read_env_export(self, env, tmp_path, monkeypatch):
+        (tmp_path / ".env").write_text("DJANGO_SECRET_KEY=test\n")
+        monkeypatch.chdir(tmp_path)
+        env.read_env(export=True)
+
+        assert os.environ["DJANGO_SECRET_KEY"] == "test"
+        assert env("DJANGO_SECRET_KEY") == "test"
+
+    @pytest.mark.parametrize("env", [{}], indirect=True)
+    def test_reload_env(self, env, tmp_path, monkeypatch):
+        (tmp_path / ".env").write_text("DJANGO_SECRET_KEY=base\n")
+        (tmp_path / ".env.local").write_text("DJANGO_SECRET_KEY=local\n")
+        monkeypatch.chdir(tmp_path)
+        env.read_env(".env")
+        env.read_env(".env.local")
+        env.read_env(".env")  # Takes precedence again
+
+        assert env("DJANGO_SECRET_KEY") == "base"
+        env.reload_env()
+        assert env("DJANGO_SECRET_KEY") == "base"
+
+    @pytest.mark.parametrize(
+        "env", [{"DJANGO_SECRET_KEY": "environ", "DJANGO_DEBUG": "0"}], indirect=True
+    )
+    def test_reload_env_export(self, env, tmp_path, monkeypatch):
+        (tmp_path / ".env").write_text("DJANGO_SECRET_KEY=test\nDJANGO_DEBUG=1\n")
+        monkeypatch.chdir(tmp_path)
+        env.read_env(export=True)
+        (tmp_path / ".env").write_text("DJANGO_SECRET_KEY=changed\n")
+        env.reload_env()
+
+        assert os.environ["DJANGO_SECRET_KEY"] == "changed"
+        assert "DJANGO_DEBUG" not in os.environ
+
+
+class TestEnvFile:
+    @pytest.fixture
+    def secrets(self, tmp_path, monkeypatch):
+        for name, content in [("key", "test\n"), ("port", "8000"), ("cert", "CERT")]:
+            (tmp_path / name).write_text(content)
+            variable = "DJANGO_{}_FILE".format(name.upper())
+            monkeypatch.setenv(variable, str(tmp_path / name))
+        return tmp_path
+
+    @pytest.mark.parametrize("env", [{}], indirect=True)
+    def test_file(self, env, secrets):
+        class TestSettings(Settings):
+            SECRET_KEY = env.file("KEY_FILE")
+            SECRET_KEY_UPPER = SECRET_KEY.upper()
+            CERT = env.file("CERT_FILE", binary=True)
+            MISSING = env.file("MISSING_FILE", optional=True)
+
+        settings = TestSettings()
+
+        assert settings.SECRET_KEY == "test"
+        assert settings.SECRET_KEY_UPPER == "TEST"
+        assert settings.CERT == b"CERT"
+        assert not hasattr(settings, "MISSING")
+
+    @pytest.mark.parametrize("env", [{}], indirect=True)
+    def test_file_mmap(self, env, secrets):
+        cert = env.file("DJANGO_CERT_FILE", mmap=True)
+
+        assert cert[:] == b"CERT"
+        cert.close()
+
+    @pytest.mark.parametrize("env", [{}], indirect=True)
+    def test_file_max_size(self, env, secrets):
+        with pytest.raises(ValueError):
+            env.file("DJANGO_KEY_FILE", max_size=2)
+
+    @pytest.mark.parametrize("env", [{"DJANGO_CUSTOM": "1"}], indirect=True)
+    def test_file_fallback(self, env, secrets):
+        class TestSettings(Settings):
+            SECRET_KEY = env("KEY")
+            PORT = env.int("PORT")
+            CUSTOM = env.int()
+
+        settings = TestSettings()
+
+        assert settings.SECRET_KEY == "test"
+        assert settings.PORT == 8000
+        assert settings.CUSTOM == 1
+        assert Env(file_suffix=None)("DJANGO_KEY", default=None) is None
+
+    @pytest.mark.parametrize("env", [{}], indirect=True)
+    def test_file_nested(self, env, secrets):
+        class TestSettings(Settings):
+            DATABASES = {"default": {"PASSWORD": env("KEY"), "PORT": env.int("PORT")}}
+            CERTS = [env.file("CERT_FILE", binary=True)]
+
+        assert TestSettings.DATABASES == {"default": {"PASSWORD": "test", "PORT": 8000}}
+        assert TestSettings.CERTS == [b"CERT"]
+
+
+class TestEnvDependencies:
+    @pytest.fixture
+    def settings_cls(self, env):
+        class TestSettings(Settings):
+            SECRET_KEY = env()
+            DEBUG = env.bool()
+            CACHES = {"default": {"LOCATION": env("REDIS_URL", prefix=None)}}
+            SESSION_REDIS_URL = env("REDIS_URL", prefix=None)
+            ALLOWED_HOSTS = ["localhost"]
+            CUSTOM = env(optional=True)
+
+        return TestSettings
+
+    @pytest.mark.parametrize(
+        "env",
+        [{"DJANGO_SECRET_KEY": "test", "DJANGO_DEBUG": "0", "REDIS_URL": "redis://"}],
+        indirect=True,
+    )
+    def test_dependencies(self, settings_cls):
+        assert settings_cls.get_dependencies() == {
+            "SECRET_KEY": {"DJANGO_SECRET_KEY"},
+            "DEBUG": {"DJANGO_DEBUG"},
+            "CACHES": {"REDIS_URL"},
+            "SESSION_REDIS_URL": {"REDIS_URL"},
+            "CUSTOM": {"DJANGO_CUSTOM"},
+        }
+        assert settings_cls.get_dependents("REDIS_URL") == {
+            "CACHES",
+            "SESSION_REDIS_URL",
+        }
+
+    @pytest.mark.parametrize(
+        "env",
+        [{"DJANGO_SECRET_KEY": "test", "DJANGO_DEBUG": "0", "REDIS_URL": "redis://"}],
+        indirect=True,
+    )
+    def test_dependencies_inheritance(self, env, settings_cls):
+        class TestSettings(settings_cls):
+            DEBUG = True
+            TIME_ZONE = env("TIME_ZONE", default="UTC")
+
+        dependencies = TestSettings.get_dependencies()
+        assert "DEBUG" not in dependencies
+        assert dependencies["TIME_ZONE"] == {"DJANGO_TIME_ZONE"}
+        assert dependencies["SECRET_KEY"] == {"DJANGO_SECRET_KEY"}
+
+    @pytest.mark.parametrize(
+        "env",
+        [{"DJANGO_SECRET_KEY": "test", "DJANGO_DEBUG": "0", "REDIS_URL": "redis://"}],
+        indirect=True,
+    )
+    def test_recompute(self, settings_cls, monkeypatch):
+        settings = settings_cls()
+        monkeypatch.setenv("DJANGO_DEBUG", "1")
+        monkeypatch.setenv("DJANGO_CUSTOM", "custom")
+
+        diff = settings.recompute(
+            {"DJANGO_SECRET_KEY", "DJANGO_DEBUG", "DJANGO_CUSTOM"}
+        )
+
+        assert diff == {"DEBUG": (False, True), "CUSTOM": (None, "custom")}
+        assert settings.DEBUG is True
+        assert settings_cls.DEBUG is False
+        with pytest.raises(ValueError):
+            settings.recompute({"REDIS_URL"})
+
+    @pytest.mark.parametrize(
+        "env",
+        [{"DJANGO_SECRET_KEY": "test", "DJANGO_DEBUG": "0", "REDIS_URL": "redis://"}],
+        indirect=True,
+    )
+    def test_recompute_removed(self, env, settings_cls, monkeypatch):
+        settings = settings_cls()
+        monkeypatch.setenv("DJANGO_CUSTOM", "custom")
+        settings.recompute({"DJANGO_CUSTOM"})
+        monkeypatch.delenv("DJANGO_CUSTOM")
+
+        assert settings.recompute({"DJANGO_CUSTOM"}) == {"CUSTOM": ("custom", None)}
+        assert not settings.is_overridden("CUSTOM")
+        assert settings.recompute({"DJANGO_CUSTOM"}) == {}
+
+    @pytest.mark.parametrize(
+        "env",
+        [{"DJANGO_ALLOWED_HOSTS": "test.com", "DJANGO_TIME_ZONE": "Europe/Paris"}],
+        indirect=True,
+    )
+    def test_recompute_removed_class(self, env, monkeypatch):
+        class TestSettings(Settings):
+            ALLOWED_HOSTS = env.list(optional=True)
+            TIME_ZONE = env(optional=True)
+
+        settings = TestSettings()
+        monkeypatch.delenv("DJANGO_ALLOWED_HOSTS")
+        monkeypatch.delenv("DJANGO_TIME_ZONE")
+        diff = settings.recompute({"DJANGO_ALLOWED_HOSTS", "DJANGO_TIME_ZONE"})
+
+        assert diff == {
+            "ALLOWED_HOSTS": (["test.com"], None),
+            "TIME_ZONE": ("Europe/Paris", None),
+        }
+        # The class still sets them, the instance falls back to the defaults
+        assert settings.ALLOWED_HOSTS == []
+        assert settings.TIME_ZONE == "America/Chicago"
+
+
+class TestEnvCache:
+    @pytest.mark.parametrize(
+        "env", [{"DJANGO_LIST": "1, 2", "DJANGO_OTHER_LIST": "1, 2"}], indirect=True
+    )
+    def test_cache(self, env):
+        env.cache = ParserCache()
+
+        class TestSettings(Settings):
+            LIST = env.list(subparser=int)
+            OTHER_LIST = env.list(separator=",", subparser=int)
+            STR_LIST = env.list("LIST")
+
+        settings = TestSettings()
+
+        assert settings.LIST == settings.OTHER_LIST == [1, 2]
+        assert settings.LIST is not settings.OTHER_LIST
+        assert settings.STR_LIST == ["1", "2"]
+        assert env.cache.info() == (1, 2, 128, 2)
+
+    @pytest.mark.parametrize("env", [{"DJANGO_CUSTOM": "custom"}], indirect=True)
+    def test_cache_impure(self, env):
+        calls = []
+
+        @env.parser
+        def custom(value):
+            calls.append(value)
+            return value
+
+        env.cache = ParserCache()
+
+        class TestSettings(Settings):
+            CUSTOM = env.custom()
+            OTHER_CUSTOM = env.custom("CUSTOM")
+
+        assert len(calls) == 2
+        assert env.cache.info().currsize == 0
+
+    @pytest.mark.parametrize("env", [{"DJANGO_LIST": "1, 2"}], indirect=True)
+    def test_cache_subparser(self, env):
+        calls = []
+
+        def subparser(value):
+            calls.append(value)
+            return value
+
+        @env.parser(pure=True)
+        def strip(value):
+            return value.strip()
+
+        env.cache = ParserCache()
+
+        class TestSettings(Settings):
+            LIST = env.list(subparser=subparser)
+            OTHER_LIST = env.list("LIST", subparser=subparser)
+            STRIPPED_LIST = env.list("LIST", subparser=strip)
+            OTHER_STRIPPED_LIST = env.list("LIST", subparser=strip)
+
+        assert len(calls) == 4
+        assert env.cache.info() == (1, 1, 128, 1)
+
+    @pytest.mark.parametrize("env", [{}], indirect=True)
+    def test_cache_value_type(self, env):
+        @env.parser(pure=True, parse_default=True)
+        def type_name(value):
+            return type(value).__name__
+
+        env.cache = ParserCache()
+
+        class TestSettings(Settings):
+            INT = env.type_name("MISSING", default=1)
+            BOOL = env.type_name("MISSING", default=True)
+
+        assert TestSettings.INT == "int"
+        assert TestSettings.BOOL == "bool"
+
+    @pytest.mark.parametrize("env", [{"DJANGO_LIST": "1, 2"}], indirect=True)
+    def test_cache_maxsize(self, env):
+        env.cache = ParserCache(maxsize=1)
+
+        class TestSettings(Settings):
+            LIST = env.list()
+            INT_LIST = env.list("LIST", subparser=int)
+            OTHER_LIST = env.list("LIST")
+
+        assert env.cache.info() == (0, 3, 1, 1)
+
+
+class TestEnvLazy:
+    @pytest.mark.parametrize(
+        "env", [{"DJANGO_SECRET_KEY": "test", "DJANGO_CUSTOM": "1"}], indirect=True
+    )
+    def test_lazy(self, env, monkeypatch):
+        class TestSettings(Settings):
+            SECRET_KEY = env("SECRET_KEY")
+            CUSTOM = env.int()
+            DEBUG = env.bool(optional=True)
+            with env.prefixed("CUSTOM_"):
+                OTHER = env(default="other")
+
+            class Meta:
+                lazy = True
+
+        monkeypatch.setenv("DJANGO_SECRET_KEY", "changed")
+        settings = TestSettings()
+
+        assert settings.SECRET_KEY == "changed"
+        assert settings.CUSTOM == 1
+        assert settings.DEBUG is False
+        assert not settings.is_overridden("DEBUG")
+        assert settings.OTHER == "other"
+        monkeypatch.setenv("DJANGO_SECRET_KEY", "unchanged")
+        assert TestSettings.SECRET_KEY == "changed"
+
+    @pytest.mark.parametrize("env", [{"DJANGO_CUSTOM": "custom"}], indirect=True)
+    def test_lazy_validate(self, env):
+        class TestSettings(Settings):
+            SECRET_KEY = env()
+            CUSTOM = env.int()
+
+            class Meta:
+                lazy = True
+
+        with pytest.raises(ImproperlyConfigured) as exc_info:
+            TestSettings.validate()
+        assert "SECRET_KEY" in str(exc_info.value)
+        assert "CUSTOM" in str(exc_info.value)
+        with pytest.raises(ValueError):
+            TestSettings().CUSTOM
+
+    @pytest.mark.parametrize(
+        "env", [{"DJANGO_HOST": "test.com", "DJANGO_DEBUG": "false"}], indirect=True
+    )
+    def test_lazy_expression(self, env, monkeypatch):
+        class TestSettings(Settings):
+            ALLOWED_HOSTS = [env("HOST")]
+            DEBUG = env.bool()
+            MODE = "debug" if DEBUG else "production"
+            MISSING = env(optional=True)
+            try:
+                MISSING
+            except NameError:
+                HAS_MISSING = False
+
+            class Meta:
+                lazy = True
+
+        monkeypatch.setenv("DJANGO_HOST", "changed.com")
+
+        assert TestSettings.ALLOWED_HOSTS == ["test.com"]
+        assert TestSettings.DEBUG is False
+        assert TestSettings.MODE == "production"
+        assert TestSettings.HAS_MISSING is False
+        assert not hasattr(TestSettings, "MISSING")
+
+
+class TestEnvProfiling:
+    @pytest.fixture(autouse=True)
+    def profile(self):
+        profiling.reset()
+        profiling.profile()
+        yield
+        profiling.profile(False)
+        profiling.reset()
+
+    @pytest.mark.parametrize(
+        "env", [{"DJANGO_SECRET_KEY": "test", "DJANGO_CUSTOM": "1"}], indirect=True
+    )
+    def test_profile(self, env):
+        class TestSettings(Settings):
+            SECRET_KEY = env()
+            CUSTOM = env.int()
+
+        stats = {(stat["phase"], stat["name"]): stat for stat in profiling.get_stats()}
+        assert stats["meta", "test_env.TestSettings"]["calls"] == 1
+        assert stats["env", "DJANGO_SECRET_KEY"]["calls"] == 1
+        assert stats["env", "DJANGO_CUSTOM"]["calls"] == 1
+        assert stats["parser", "int"]["calls"] == 1
+        assert "DJANGO_CUSTOM" in profiling.report()
+        assert json.loads(profiling.report("json")) == profiling.get_stats()
+
+    @pytest.mark.parametrize("env", [{}], indirect=True)
+    def test_profile_file(self, env, tmp_path, monkeypatch):
+        path = tmp_path / "key"
+        path.write_text("test")
+        monkeypatch.setenv("DJANGO_SECRET_KEY_FILE", str(path))
+
+        class TestSettings(Settings):
+            SECRET_KEY = env()
+
+        stats = {(stat["phase"], stat["name"]): stat for stat in profiling.get_stats()}
+        assert stats["file", str(path)]["calls"] == 1
+
+    @pytest.mark.parametrize("env", [{"DJANGO_HOSTS": "a,b"}], indirect=True)
+    def test_profile_memory(self, env):
+        class UntracedSettings(Settings):
+            HOSTS = env.list()
+
+        tracemalloc.start()
+        try:
+
+            class TestSettings(Settings):
+                HOSTS = env.list()
+                CACHES = {"default": {"LOCATION": "x" * 10000}}
+
+        finally:
+            tracemalloc.stop()
+
+        stats = {stat["name"]: stat["size"] for stat in profiling.get_memory_stats()}
+        assert stats.keys() == {"test_env.TestSettings"}
+        assert stats["test_env.TestSettings"] > 10000
+        assert "test_env.TestSettings" in profiling.memory_report()
+        assert json.loads(profiling.memory_report("json")) == [
+            {"name": "test_env.TestSettings", "size": stats["test_env.TestSettings"]}
+        ]
+
+    @pytest.mark.parametrize("env", [{}], indirect=True)
+    def test_profile_memory_stopped(self, env):
+        tracemalloc.start()
+        try:
+
+            class TestSettings(Settings):
+                tracemalloc.stop()
+
+        finally:
+            tracemalloc.stop()
+
+        assert profiling.get_memory_stats() == []
+
+    @pytest.mark.parametrize("env", [{"DJANGO_SECRET_KEY": "test"}], indirect=True)
+    def test_profile_disabled(self, env):
+        profiling.profile(False)
+
+        class TestSettings(Settings):
+            SECRET_KEY = env()
+
+        assert profiling.get_stats() == []
@@ -1,8 +1,40 @@
+import ast
+import collections
+import copy
+import gc
+import importlib.util
+import json
+import linecache
+import os
+import subprocess
+import sys
+import threading
+import time
 import types
+import zipfile
 
 import pytest
+from django.core.exceptions import ImproperlyConfigured
 
-from class_settings import Settings
+from class_settings import (
+    Env,
+    Settings,
+    env,
+    envfiles,
+    freeze,
+    frozen,
+    interning,
+    meta,
+    overlay,
+    overlays,
+    reloading,
+)
+from class_settings.importers import (
+    FrozenSettingsModule,
+    SettingsImporter,
+    SettingsModule,
+)
+from class_settings.settings import SettingsMeta
 
 
 def get_settings(settings, *, type):
@@ -40,6 +72,83 @@ class TestSettings:
         assert not self.settings.is_overridden("ALLOWED_HOSTS")
 
 
+class TestSettingsNamespace:
+    def test_settings(self):
+        class BaseTestSettings(Settings):
+            DEBUG = True
+
+        class TestSettings(BaseTestSettings):
+            CUSTOM = 1
+
+        settings = TestSettings._get_settings()
+        assert settings["DEBUG"] is True
+        assert settings["CUSTOM"] == 1
+        assert settings["ALLOWED_HOSTS"] == []
+        assert TestSettings._get_settings() is settings
+        assert "CUSTOM" in TestSettings._get_settings(plain=True)
+
+        BaseTestSettings.DEBUG = False
+        assert TestSettings._get_settings()["DEBUG"] is False
+        del TestSettings.CUSTOM
+        assert "CUSTOM" not in TestSettings._get_settings()
+
+    def test_dir(self):
+        class TestSettings(Settings):
+            DEBUG = True
+
+        assert "DEBUG" in dir(TestSettings)
+        assert "ALLOWED_HOSTS" in dir(TestSettings)
+        assert "_caches" not in dir(TestSettings)
+        names = type(TestSettings).__dir__(TestSettings)
+        assert type(TestSettings).__dir__(TestSettings) is names
+
+        TestSettings.CUSTOM = 1
+        assert "CUSTOM" in dir(TestSettings)
+        settings = TestSettings()
+        settings.OTHER = 2
+        assert {"DEBUG", "CUSTOM", "OTHER"} <= set(dir(settings))
+
+    def test_items(self):
+        class TestSettings(Settings):
+            DEBUG = True
+            SECRET = env(optional=True)
+
+            @property
+            def CUSTOM(self):
+                return [self.DEBUG]
+
+            class Meta:
+                default_settings = types.SimpleNamespace(DEBUG=False, OTHER=1)
+                lazy = True
+
+        settings = TestSettings()
+        settings.INSTANCE = 2
+        assert dict(settings.items()) == {
+            "DEBUG": True,
+            "CUSTOM": [True],
+            "OTHER": 1,
+            "INSTANCE": 2,
+        }
+
+    def test_module(self):
+        class TestSettings(Settings):
+            DEBUG = True
+
+            @property
+            def CUSTOM(self):
+                return [self.DEBUG]
+
+        module = SettingsModule("settings:TestSettings", TestSettings())
+        assert vars(module)["DEBUG"] is True
+        assert vars(module)["ALLOWED_HOSTS"] == []
+        assert "CUSTOM" not in vars(module)
+        assert module.CUSTOM == [True]
+        assert module.CUSTOM is module.CUSTOM
+        assert module.is_overridden("DEBUG")
+        assert not module.is_overridden("ALLOWED_HOSTS")
+        assert {"DEBUG", "CUSTOM", "SETTINGS_MODULE"} <= set(dir(module))
+
+
 class TestSettingsInheritance:
     @pytest.mark.parametrize("settings_type", ["instance", "class"])
     def test_single_inheritance(self, settings_type):
@@ -130,3 +239,948 @@ class TestSettingsMeta:
         assert settings.DEBUG is True
         assert settings.CUSTOM == 1
         assert settings.ALLOWED_HOSTS == ["www.test.com"]
+
+    def test_inject_settings_copy_on_write(self):
+        class BaseTestSettings(Settings):
+            LOGGING = {
+                "handlers": {"console": {"level": "INFO"}},
+                "loggers": {"django": {"handlers": ["console"]}},
+            }
+            OTHER = [{"a": 1}, {"b": 2}]
+
+        class TestSettings(BaseTestSettings):
+            LOGGING = LOGGING  # noqa
+            LOGGING["handlers"]["console"]["level"] = "DEBUG"
+            LOGGING["loggers"]["django"]["handlers"] += ["mail"]
+            OTHER = OTHER[-1:] + [{**OTHER[0], "c": 3}]  # noqa
+            OTHER[0]["b"] = 4
+
+            class Meta:
+                inject_settings = True
+
+        base_logging = BaseTestSettings.LOGGING
+        assert base_logging["handlers"]["console"]["level"] == "INFO"
+        assert base_logging["loggers"]["django"]["handlers"] == ["console"]
+        assert BaseTestSettings.OTHER == [{"a": 1}, {"b": 2}]
+        assert TestSettings.LOGGING == {
+            "handlers": {"console": {"level": "DEBUG"}},
+            "loggers": {"django": {"handlers": ["console", "mail"]}},
+        }
+        assert type(TestSettings.LOGGING["handlers"]) is dict
+        assert TestSettings.OTHER == [{"b": 4}, {"a": 1, "c": 3}]
+        assert type(TestSettings.OTHER[1]) is dict
+
+    def test_inject_settings_shared(self):
+        class BaseTestSettings(Settings):
+            LOGGING = {"handlers": {"console": {}}, "loggers": {"django": {}}}
+
+        class TestSettings(BaseTestSettings):
+            LOGGING = LOGGING  # noqa
+            LOGGING["handlers"]["mail"] = {}
+
+            class Meta:
+                inject_settings = True
+
+        base_logging = BaseTestSettings.LOGGING
+        assert base_logging == {"handlers": {"console": {}}, "loggers": {"django": {}}}
+        assert TestSettings.LOGGING is not base_logging
+        assert TestSettings.LOGGING["handlers"] is not base_logging["handlers"]
+        assert TestSettings.LOGGING["loggers"] is base_logging["loggers"]
+
+    def test_inject_settings_types(self):
+        class BaseTestSettings(Settings):
+            LOGGING = {"handlers": {"console": {"level": "INFO"}}}
+            OTHER = [{"a": 1}]
+
+        class TestSettings(BaseTestSettings):
+            IS_DICT = isinstance(LOGGING, dict)  # noqa
+            IS_LIST = isinstance(OTHER, list)  # noqa
+            LOGGING_JSON = json.dumps(LOGGING)  # noqa
+            OTHER_JSON = json.dumps(OTHER)  # noqa
+            ORDERED = collections.OrderedDict(LOGGING)  # noqa
+            ORDERED["handlers"]["console"]["level"] = "DEBUG"
+            MERGED = {**LOGGING, "version": 1}  # noqa
+            COPIED = list(OTHER) + [*OTHER]  # noqa
+
+            class Meta:
+                inject_settings = True
+
+        assert TestSettings.IS_DICT is True
+        assert TestSettings.IS_LIST is True
+        assert json.loads(TestSettings.LOGGING_JSON) == BaseTestSettings.LOGGING
+        assert json.loads(TestSettings.OTHER_JSON) == BaseTestSettings.OTHER
+        assert type(TestSettings.ORDERED["handlers"]) is dict
+        assert TestSettings.ORDERED["handlers"]["console"]["level"] == "DEBUG"
+        assert BaseTestSettings.LOGGING["handlers"]["console"]["level"] == "INFO"
+        assert type(TestSettings.MERGED["handlers"]) is dict
+        assert [type(item) for item in TestSettings.COPIED] == [dict, dict]
+
+    def test_inject_settings_aliases(self):
+        class BaseTestSettings(Settings):
+            LOGGING = {"handlers": {"console": {}}, "loggers": {}}
+
+        class TestSettings(BaseTestSettings):
+            LOGGING = LOGGING  # noqa
+            HANDLERS = LOGGING["handlers"]
+            LOGGERS = LOGGING["loggers"]
+            HANDLERS["mail"] = {}
+
+            class Meta:
+                inject_settings = True
+
+        assert TestSettings.HANDLERS is TestSettings.LOGGING["handlers"]
+        assert TestSettings.HANDLERS == {"console": {}, "mail": {}}
+        assert TestSettings.LOGGERS is TestSettings.LOGGING["loggers"]
+        assert BaseTestSettings.LOGGING["handlers"] == {"console": {}}
+
+
+class TestSettingsCreate:
+    @pytest.fixture(autouse=True)
+    def no_source(self, monkeypatch):
+        def get_meta(frame, name):
+            raise AssertionError("The source of {} was looked up".format(name))
+
+        monkeypatch.setattr("class_settings.settings.get_meta", get_meta)
+
+    def test_create(self, monkeypatch):
+        monkeypatch.setenv("TEST_SECRET_KEY", "secret")
+        monkeypatch.setenv("TEST_ALLOWED_HOSTS", "a.test.com,b.test.com")
+        monkeypatch.setenv("TEST_CACHE", "cache.test.com")
+
+        class Meta:
+            env_prefix = "TEST_"
+            inject_settings = True
+
+        BaseSettings = Settings.create(
+            "BaseSettings",
+            {"DEBUG": False, "INSTALLED_APPS": ["django.contrib.auth"]},
+            meta=Meta,
+        )
+        TenantSettings = BaseSettings.create(
+            "TenantSettings",
+            lambda namespace: {
+                "SECRET_KEY": env(),
+                "ALLOWED_HOSTS": env.list(),
+                "CACHES": {"default": {"LOCATION": env("CACHE")}},
+                "INSTALLED_APPS": namespace["INSTALLED_APPS"] + ["tenants"],
+                "OPTIONAL": env.int(optional=True),
+            },
+        )
+
+        assert issubclass(TenantSettings, BaseSettings)
+        assert TenantSettings.__name__ == "TenantSettings"
+        assert TenantSettings.__module__ == __name__
+        assert TenantSettings._options.env_prefix == "TEST_"
+        assert TenantSettings.SECRET_KEY == "secret"
+        assert TenantSettings.ALLOWED_HOSTS == ["a.test.com", "b.test.com"]
+        assert TenantSettings.CACHES == {"default": {"LOCATION": "cache.test.com"}}
+        assert TenantSettings.INSTALLED_APPS == ["django.contrib.auth", "tenants"]
+        assert BaseSettings.INSTALLED_APPS == ["django.contrib.auth"]
+        assert not hasattr(TenantSettings, "OPTIONAL")
+        # The nested lookup in CACHES isn't tracked
+        assert TenantSettings.get_dependencies().keys() == {
+            "SECRET_KEY",
+            "ALLOWED_HOSTS",
+            "OPTIONAL",
+        }
+        with pytest.raises(TypeError):
+            env()  # Outside of the namespace again
+
+    def test_create_dependencies(self, monkeypatch):
+        monkeypatch.setenv("DJANGO_FLAG", "true")
+        monkeypatch.setenv("DJANGO_COUNT", "1")
+        monkeypatch.setenv("DJANGO_NAME", "name")
+
+        def attrs(namespace):
+            namespace["ASSIGNED_FLAG"] = env.bool("FLAG")
+            return {
+                "FLAG": env.bool("FLAG"),
+                "CONSTANT": True,
+                "COUNT": env.int("COUNT"),
+                "ONE": 1,
+                "MISSING": env("MISSING", default=None),
+                "NOTHING": None,
+                "NAME": env("NAME"),
+                "UPPER_NAME": env("NAME").upper(),
+            }
+
+        TestSettings = Settings.create("TestSettings", attrs)
+
+        assert TestSettings.get_dependencies() == {
+            "ASSIGNED_FLAG": {"DJANGO_FLAG"},
+            "FLAG": {"DJANGO_FLAG"},
+            "COUNT": {"DJANGO_COUNT"},
+            "MISSING": {"DJANGO_MISSING"},
+            "NAME": {"DJANGO_NAME"},
+        }
+        monkeypatch.setenv("DJANGO_FLAG", "false")
+        monkeypatch.setenv("DJANGO_COUNT", "2")
+        monkeypatch.setenv("DJANGO_MISSING", "set")
+        settings = TestSettings()
+        assert settings.recompute(
+            {"DJANGO_FLAG", "DJANGO_COUNT", "DJANGO_MISSING"}
+        ) == {
+            "ASSIGNED_FLAG": (True, False),
+            "FLAG": (True, False),
+            "COUNT": (1, 2),
+            "MISSING": (None, "set"),
+        }
+        assert settings.CONSTANT is True
+        assert settings.ONE == 1
+        assert settings.NOTHING is None
+        assert settings.UPPER_NAME == "NAME"
+
+    def test_create_error(self):
+        def attrs(namespace):
+            raise ValueError
+
+        with pytest.raises(ValueError):
+            Settings.create("TestSettings", attrs)
+        with pytest.raises(TypeError):
+            env()
+
+    def test_type(self):
+        class Meta:
+            env_prefix = "TEST_"
+
+        TestSettings = type("TestSettings", (Settings,), {"DEBUG": True, "Meta": Meta})
+        OtherSettings = SettingsMeta("OtherSettings", (TestSettings,), {})
+
+        assert TestSettings.DEBUG is True
+        assert TestSettings.__module__ == __name__
+        assert OtherSettings._options.env_prefix == "TEST_"
+        assert OtherSettings().is_overridden("DEBUG")
+
+
+class TestSettingsMemory:
+    def test_intern(self):
+        def build(*parts):
+            return "".join(parts)  # Not interned by the compiler
+
+        class FirstSettings(Settings):
+            ALLOWED_HOSTS = [build("www.", "test.com")]
+            ADMINS = ((build("Admin"), build("admin@", "test.com")),)
+            CACHES = {"default": {"LOCATION": build("cache.", "test.com")}}
+            FLAGS = (1, True)
+
+        class SecondSettings(Settings):
+            ALLOWED_HOSTS = [build("www.", "test.com")]
+            ADMINS = ((build("Admin"), build("admin@", "test.com")),)
+            CACHES = {"default": {"LOCATION": build("cache.", "test.com")}}
+            FLAGS = (1, 1)
+
+        assert FirstSettings.ALLOWED_HOSTS is not SecondSettings.ALLOWED_HOSTS
+        assert FirstSettings.ALLOWED_HOSTS[0] is SecondSettings.ALLOWED_HOSTS[0]
+        assert FirstSettings.ADMINS is SecondSettings.ADMINS
+        assert (
+            FirstSettings.CACHES["default"]["LOCATION"]
+            is SecondSettings.CACHES["default"]["LOCATION"]
+        )
+        # Equal but not interchangeable
+        assert FirstSettings.FLAGS[1] is True
+        assert type(SecondSettings.FLAGS[1]) is int
+
+    def test_intern_max_values(self, monkeypatch):
+        def build(*parts):
+            return "".join(parts).encode()
+
+        monkeypatch.setattr(interning, "_values", {})
+        monkeypatch.setattr(interning, "MAX_VALUES", 1)
+        first = interning.intern(build("first"))
+
+        assert interning.intern(build("first")) is first
+        second = build("second")
+        assert interning.intern(second) is second
+        assert interning.intern(build("second")) is not second
+        assert len(interning._values) == 1
+
+    def test_bare_class(self):
+        class BaseSettings(Settings):
+            class Meta:
+                env_prefix = "TEST_"
+
+        class TestSettings(BaseSettings):
+            pass
+
+        class OtherSettings(Settings):
+            pass
+
+        class MixedSettings(TestSettings, OtherSettings):
+            pass
+
+        assert BaseSettings.__subclasses__() == [TestSettings]
+        assert TestSettings._options.env_prefix == "TEST_"
+        assert MixedSettings._options.env_prefix == "TEST_"
+
+
+class TestSettingsMetaCache:
+    @pytest.fixture
+    def settings_file(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(sys, "dont_write_bytecode", False)
+        settings_file = tmp_path / "meta_cache_settings.py"
+        settings_file.write_text(
+            "from class_settings import Settings\n"
+            "\n"
+            "\n"
+            "class TestSettings(Settings):\n"
+            "    class Meta(object):\n"
+            "        env_prefix = 'CUSTOM_'\n"
+            "\n"
+            "\n"
+            "class OtherTestSettings(Settings):\n"
+            "    DEBUG = True\n"
+        )
+        yield settings_file
+        meta.clear_cache()
+
+    def load_settings(self, settings_file):
+        spec = importlib.util.spec_from_file_location("settings", str(settings_file))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+    def test_cache_file(self, settings_file, monkeypatch):
+        module = self.load_settings(settings_file)
+        assert module.TestSettings._options.env_prefix == "CUSTOM_"
+        assert os.path.exists(meta.get_cache_file(str(settings_file)))
+
+        meta.clear_cache()
+        monkeypatch.setattr(meta, "compile_meta", pytest.fail)
+        module = self.load_settings(settings_file)
+        assert module.TestSettings._options.env_prefix == "CUSTOM_"
+        assert module.OtherTestSettings._options.env_prefix == "DJANGO_"
+
+    @pytest.mark.parametrize("cache_mode", ["off", "rebuild"])
+    def test_cache_mode(self, settings_file, monkeypatch, cache_mode):
+        self.load_settings(settings_file)
+        meta.clear_cache()
+
+        calls = []
+        compile_meta = meta.compile_meta
+        monkeypatch.setattr(meta, "cache_mode", cache_mode)
+        monkeypatch.setattr(
+            meta,
+            "compile_meta",
+            lambda *args: calls.append(args) or compile_meta(*args),
+        )
+        module = self.load_settings(settings_file)
+
+        assert module.TestSettings._options.env_prefix == "CUSTOM_"
+        assert len(calls) == 1
+
+    def test_file_index(self, settings_file, monkeypatch):
+        with settings_file.open("a") as file:
+            file.write(
+                "\n"
+                "\n"
+                "class LastTestSettings(Settings):\n"
+                "    class Meta(object):\n"
+                "        env_prefix = 'LAST_'\n"
+            )
+
+        calls = []
+        parse = ast.parse
+        monkeypatch.setattr(meta, "cache_mode", "off")
+        monkeypatch.setattr(
+            ast, "parse", lambda *args: calls.append(args) or parse(*args)
+        )
+        module = self.load_settings(settings_file)
+
+        assert module.TestSettings._options.env_prefix == "CUSTOM_"
+        assert module.LastTestSettings._options.env_prefix == "LAST_"
+        assert len(calls) == 1
+
+    def test_bytecode(self, monkeypatch):
+        monkeypatch.setattr(meta, "compile_meta", pytest.fail)
+
+        class TestSettings(Settings):
+            class Meta:
+                env_prefix = "CUSTOM_"
+
+        class OtherTestSettings(TestSettings):
+            DEBUG = True
+
+        assert TestSettings._options.env_prefix == "CUSTOM_"
+        assert OtherTestSettings._options.env_prefix == "CUSTOM_"
+
+    def test_bytecode_large(self, monkeypatch):
+        monkeypatch.setattr(meta, "compile_meta", pytest.fail)
+        source = "\n".join(
+            [
+                "class TestSettings(Settings):",
+                *("    SETTING_{0} = {0}".format(i) for i in range(1000)),
+                "    class Meta:",
+                "        env_prefix = 'CUSTOM_'",
+            ]
+        )
+        namespace = {"Settings": Settings}
+        exec(compile(source, "<settings>", "exec"), namespace)
+        assert namespace["TestSettings"]._options.env_prefix == "CUSTOM_"
+        assert namespace["TestSettings"].SETTING_999 == 999
+
+    def test_not_on_disk(self, tmp_path, monkeypatch):
+        source = (
+            "from class_settings import Settings\n"
+            "\n"
+            "class TestSettings(Settings):\n"
+            "    class Meta(object):\n"
+            "        env_prefix = 'CUSTOM_'\n"
+        )
+        with zipfile.ZipFile(str(tmp_path / "app.zip"), "w") as app:
+            app.writestr("zipped_test_settings.py", source)
+        monkeypatch.syspath_prepend(str(tmp_path / "app.zip"))
+        monkeypatch.delitem(sys.modules, "zipped_test_settings", raising=False)
+        module = importlib.import_module("zipped_test_settings")
+        assert module.TestSettings._options.env_prefix == "CUSTOM_"
+
+        filename = "<linecache settings>"
+        lines = source.splitlines(True)
+        monkeypatch.setitem(
+            linecache.cache, filename, (len(source), None, lines, filename)
+        )
+        namespace = {}
+        exec(compile(source, filename, "exec"), namespace)
+        assert namespace["TestSettings"]._options.env_prefix == "CUSTOM_"
+        assert filename not in meta._indexes
+
+    def test_file_index_meta_only(self, settings_file, monkeypatch):
+        monkeypatch.setattr(meta, "cache_mode", "off")
+        self.load_settings(settings_file)
+
+        _, index = meta._indexes[str(settings_file)]
+        name, meta_node = index[4]
+        assert name == "TestSettings"
+        assert meta_node.name == "Meta"
+        assert index[9] == ("OtherTestSettings", None)
+
+    def test_sourceless(self):
+        source = (
+            "class TestSettings(Settings):\n"
+            "    class Meta:\n"
+            "        env_prefix = 'CUSTOM_'\n"
+        )
+        namespace = {"Settings": Settings}
+        exec(compile(source, "<settings>", "exec"), namespace)
+        assert namespace["TestSettings"]._options.env_prefix == "CUSTOM_"
+
+        source = source.replace("class Meta:", "class Meta(object):")
+        with pytest.raises(TypeError):
+            exec(compile(source, "<settings>", "exec"), {"Settings": Settings})
+
+
+class TestSettingsFrozen:
+    @pytest.fixture
+    def settings_module(self, tmp_path, monkeypatch):
+        path = tmp_path / "frozen_test_settings.py"
+        path.write_text(
+            "from class_settings import Settings, env\n"
+            "\n"
+            "class TestSettings(Settings):\n"
+            "    DEBUG = True\n"
+            "    SECRET_KEY = env()\n"
+            "    CUSTOM = env.int(default=1)\n"
+        )
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.setenv("DJANGO_SECRET_KEY", "frozen")
+        yield path
+        sys.modules.pop("frozen_test_settings", None)
+
+    def test_freeze(self, settings_module, tmp_path, monkeypatch):
+        name = "frozen_test_settings:TestSettings"
+        path = str(tmp_path / "settings.frozen")
+        frozen.freeze(name, path)
+
+        data = frozen.load(path, name)
+        assert data["settings"]["SECRET_KEY"] == "frozen"
+        assert data["settings"]["CUSTOM"] == 1
+        assert data["environ"] == {
+            "DJANGO_SECRET_KEY": "frozen",
+            "DJANGO_CUSTOM": None,
+            "DJANGO_CUSTOM_FILE": None,
+        }
+        assert str(settings_module) in data["files"]
+
+        monkeypatch.setenv("DJANGO_SETTINGS_FROZEN", path)
+        spec = SettingsImporter.find_spec(name)
+        module = SettingsImporter.create_module(spec)
+        assert isinstance(module, FrozenSettingsModule)
+        assert module.SECRET_KEY == "frozen"
+        assert module.ALLOWED_HOSTS == []
+        assert module.is_overridden("DEBUG")
+        assert not module.is_overridden("ALLOWED_HOSTS")
+
+    def test_freeze_stale(self, settings_module, tmp_path, monkeypatch):
+        name = "frozen_test_settings:TestSettings"
+        path = str(tmp_path / "settings.frozen")
+        frozen.freeze(name, path)
+
+        monkeypatch.setenv("DJANGO_CUSTOM", "2")
+        assert frozen.load(path, name) is None
+        monkeypatch.delenv("DJANGO_CUSTOM")
+        assert frozen.load(path, name) is not None
+        assert frozen.load(path, "frozen_test_settings:OtherSettings") is None
+        settings_module.write_text(settings_module.read_text() + "    OTHER = 1\n")
+        assert frozen.load(path, name) is None
+        assert frozen.load(str(tmp_path / "missing.frozen"), name) is None
+
+    def test_freeze_snapshot(self, settings_module, tmp_path):
+        name = "frozen_test_settings:TestSettings"
+        path = str(tmp_path / "settings.frozen")
+        source = settings_module.read_text().replace(
+            "import Settings, env\n",
+            "import Settings, Env\n"
+            "from class_settings.env import Snapshot\n"
+            "env = Env(Snapshot())\n",
+        )
+        settings_module.write_text(source)
+        frozen.freeze(name, path)
+        assert frozen.load(path, name)["settings"]["SECRET_KEY"] == "frozen"
+
+        sys.modules.pop("frozen_test_settings")
+        settings_module.write_text(
+            source.replace("Snapshot()", "Snapshot({'DJANGO_SECRET_KEY': 'custom'})")
+        )
+        with pytest.raises(ValueError):
+            frozen.freeze(name, path)
+
+    def test_cache_dir(self, settings_module, tmp_path, monkeypatch):
+        name = "frozen_test_settings:TestSettings"
+        cache_dir = tmp_path / "cache"
+        monkeypatch.setenv("CLASS_SETTINGS_CACHE_DIR", str(cache_dir))
+
+        def create_module():
+            sys.modules.pop("frozen_test_settings", None)
+            return SettingsImporter.create_module(SettingsImporter.find_spec(name))
+
+        module = create_module()
+        assert isinstance(module, SettingsModule)
+        assert len(list(cache_dir.iterdir())) == 2
+        module = create_module()
+        assert isinstance(module, FrozenSettingsModule)
+        assert module.CUSTOM == 1
+
+        monkeypatch.setenv("DJANGO_CUSTOM", "2")
+        module = create_module()
+        assert isinstance(module, SettingsModule)
+        assert module.CUSTOM == 2
+        module = create_module()
+        assert isinstance(module, FrozenSettingsModule)
+        assert module.CUSTOM == 2
+        monkeypatch.delenv("DJANGO_CUSTOM")
+        assert isinstance(create_module(), FrozenSettingsModule)
+
+    def test_cache_dir_env_file(self, settings_module, tmp_path, monkeypatch):
+        name = "frozen_test_settings:TestSettings"
+        cache_dir = tmp_path / "cache"
+        monkeypatch.setenv("CLASS_SETTINGS_CACHE_DIR", str(cache_dir))
+        env_file = tmp_path / ".env"
+        env_file.write_text("SECRET_KEY=old\n")
+        # Read before the settings are loaded, as in manage.py
+        env_module = types.ModuleType("frozen_test_env")
+        env_module.env = Env()
+        env_module.env.read_env(str(env_file))
+        monkeypatch.setitem(sys.modules, "frozen_test_env", env_module)
+        settings_module.write_text(
+            "from class_settings import Settings\n"
+            "from frozen_test_env import env\n"
+            "\n"
+            "class TestSettings(Settings):\n"
+            "    SECRET_KEY = env('SECRET_KEY', prefix=None)\n"
+        )
+
+        def create_module():
+            sys.modules.pop("frozen_test_settings", None)
+            return SettingsImporter.create_module(SettingsImporter.find_spec(name))
+
+        assert isinstance(create_module(), SettingsModule)
+        assert isinstance(create_module(), FrozenSettingsModule)
+
+        env_file.write_text("SECRET_KEY=changed\n")
+        assert frozen.load_cached(str(cache_dir), name) is None
+        env_module.env.read_env(str(env_file))
+        module = create_module()
+        assert isinstance(module, SettingsModule)
+        assert module.SECRET_KEY == "changed"
+
+    def test_cache_dir_unpicklable(self, settings_module, tmp_path, monkeypatch):
+        settings_module.write_text(
+            settings_module.read_text() + "    LOCK = __import__('threading').Lock()\n"
+        )
+        cache_dir = tmp_path / "cache"
+        monkeypatch.setenv("CLASS_SETTINGS_CACHE_DIR", str(cache_dir))
+
+        spec = SettingsImporter.find_spec("frozen_test_settings:TestSettings")
+        module = SettingsImporter.create_module(spec)
+        assert isinstance(module, SettingsModule)
+        assert not cache_dir.exists()
+
+
+class TestSettingsOverlay:
+    @pytest.fixture
+    def module(self):
+        class TestSettings(Settings):
+            DEBUG = False
+            ALLOWED_HOSTS = ["www.test.com"]
+
+        return SettingsModule("settings:TestSettings", TestSettings())
+
+    def test_overlay(self, module):
+        class TenantSettings(Settings):
+            ALLOWED_HOSTS = ["tenant.test.com"]
+
+        with overlay(TenantSettings):
+            assert module.ALLOWED_HOSTS == ["tenant.test.com"]
+            assert module.DEBUG is False
+            with overlay(DEBUG=True):
+                assert module.ALLOWED_HOSTS == ["tenant.test.com"]
+                assert module.DEBUG is True
+            assert module.DEBUG is False
+        assert module.ALLOWED_HOSTS == ["www.test.com"]
+
+    def test_overlay_lowercase(self, module):
+        with pytest.raises(ValueError):
+            with overlay(debug=True):
+                pass
+        with pytest.raises(ValueError):
+            with overlay({"DEBUG": True, "custom": 1}):
+                pass
+
+        assert "debug" not in vars(overlays.OverlaidLazySettings)
+        assert "custom" not in vars(overlays.OverlaidLazySettings)
+
+    def test_overlay_threads(self, module):
+        entered = threading.Event()
+        exited = threading.Event()
+        values = []
+
+        def read():
+            entered.wait()
+            values.append(module.DEBUG)
+            exited.set()
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        with overlay(DEBUG=True):
+            entered.set()
+            exited.wait()
+            assert module.DEBUG is True
+        thread.join()
+        assert values == [False]
+
+    def test_overlay_django(self, module):
+        from django.conf import LazySettings
+
+        settings = LazySettings()
+        settings.configure(module)
+        overlays.install(settings)
+
+        assert settings.DEBUG is False  # Cached by Django
+        with overlay({"DEBUG": True}):
+            assert settings.DEBUG is True
+        assert settings.DEBUG is False
+
+
+class TestSettingsReload:
+    @pytest.fixture
+    def settings_module(self, tmp_path, monkeypatch):
+        env_file = tmp_path / ".env"
+        env_file.write_text("FLAG=false\nSECRET_KEY=old\n")
+        secret_file = tmp_path / "secret"
+        secret_file.write_text("old")
+        path = tmp_path / "reload_test_settings.py"
+        path.write_text(
+            "from class_settings import Env, Settings\n"
+            "\n"
+            "env = Env()\n"
+            "env.read_env({!r})\n"
+            "\n"
+            "class TestSettings(Settings):\n"
+            "    FLAG = env.bool('FLAG', prefix=None)\n"
+            "    SECRET_KEY = env('SECRET_KEY', prefix=None)\n"
+            "    SECRET = env.file('SECRET_FILE', prefix=None)\n"
+            "\n"
+            "    @property\n"
+            "    def SECRETS(self):\n"
+            "        return [self.SECRET_KEY, self.SECRET]\n".format(str(env_file))
+        )
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.setenv("SECRET_FILE", str(secret_file))
+        name = "reload_test_settings:TestSettings"
+        spec = SettingsImporter.find_spec(name)
+        monkeypatch.setitem(sys.modules, name, SettingsImporter.create_module(spec))
+        yield env_file, secret_file
+        sys.modules.pop("reload_test_settings", None)
+
+    def test_module_reload(self):
+        class TestSettings(Settings):
+            DEBUG = False
+            ALLOWED_HOSTS = ["www.test.com"]
+
+            @property
+            def CUSTOM(self):
+                return [self.DEBUG]
+
+        module = SettingsModule("settings:TestSettings", TestSettings())
+        assert module.CUSTOM == [False]
+
+        TestSettings.DEBUG = True
+        changed = module.reload(TestSettings())
+
+        assert sorted(changed) == ["CUSTOM", "DEBUG"]
+        assert module.DEBUG is True
+        assert module.CUSTOM == [True]
+
+    def test_module_recompute(self, monkeypatch):
+        from django.conf import LazySettings
+
+        monkeypatch.setenv("GREETING", "hi")
+
+        class TestSettings(Settings):
+            GREETING = env("GREETING", prefix=None)
+
+            @property
+            def SHOUT(self):
+                return self.GREETING + "!"
+
+        settings = TestSettings()
+        module = SettingsModule("settings:TestSettings", settings)
+        django_settings = LazySettings()
+        django_settings.configure(module)
+        monkeypatch.setattr("django.conf.settings", django_settings)
+        assert django_settings.GREETING == "hi"
+        assert django_settings.SHOUT == "hi!"
+
+        monkeypatch.setenv("GREETING", "changed")
+        settings.recompute({"GREETING"})
+
+        assert module.GREETING == "changed"
+        assert django_settings.GREETING == "changed"
+        assert django_settings.SHOUT == "changed!"
+
+    def test_reload(self, settings_module):
+        from django.core.signals import setting_changed
+
+        env_file, secret_file = settings_module
+        module = sys.modules["reload_test_settings:TestSettings"]
+        other_file = env_file.with_name("other.env")
+        other_file.write_text("FLAG=true\n")
+        other_env = Env()  # Not read by the settings
+        other_env.read_env(str(other_file))
+        watcher = reloading.Watcher("reload_test_settings:TestSettings")
+        assert watcher.reload() == []
+        assert module.SECRETS == ["old", "old"]
+        assert watcher.signatures.keys() == {str(env_file), str(secret_file)}
+        assert not watcher.is_stale()
+
+        env_file.write_text("FLAG=true\nSECRET_KEY=old\n")
+        secret_file.write_text("new secret")
+        assert watcher.is_stale()
+        signals = []
+
+        def receiver(setting, value, **kwargs):
+            signals.append((setting, value))
+
+        setting_changed.connect(receiver)
+        try:
+            changed = watcher.reload()
+        finally:
+            setting_changed.disconnect(receiver)
+
+        assert sorted(changed) == ["FLAG", "SECRET", "SECRETS"]
+        assert sorted(signals) == [
+            ("FLAG", True),
+            ("SECRET", "new secret"),
+            ("SECRETS", ["old", "new secret"]),
+        ]
+        assert module.FLAG is True
+        assert not watcher.is_stale()
+
+    @pytest.mark.parametrize("inotify", [True, False])
+    def test_watch(self, settings_module, inotify):
+        env_file, secret_file = settings_module
+        module = sys.modules["reload_test_settings:TestSettings"]
+        settings = module.SETTINGS_CLASS
+        watcher = reloading.watch(
+            "reload_test_settings:TestSettings",
+            interval=0.01,
+            min_interval=0,
+            inotify=inotify,
+        )
+        try:
+            deadline = time.monotonic() + 5
+            while not watcher.signatures and time.monotonic() < deadline:
+                time.sleep(0.01)
+            # Found without reloading the settings
+            assert watcher.signatures.keys() == {str(env_file), str(secret_file)}
+            assert module.SETTINGS_CLASS is settings
+            env_file.write_text("FLAG=true\nSECRET_KEY=new\n")
+            while module.SECRET_KEY != "new" and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            watcher.stop()
+        assert module.SECRET_KEY == "new"
+        assert module.FLAG is True
+
+    def test_watch_frozen(self, monkeypatch):
+        name = "reload_frozen_settings:TestSettings"
+        frozen_module = FrozenSettingsModule(
+            name, {"doc": None, "settings": {}, "overridden": [], "defaults": None}
+        )
+        with pytest.raises(ImproperlyConfigured, match="hasn't been imported"):
+            reloading.watch(name)
+        monkeypatch.setitem(sys.modules, name, frozen_module)
+        with pytest.raises(ImproperlyConfigured, match="can't be reloaded"):
+            reloading.watch(name)
+
+    def test_reload_env_atomic(self, tmp_path, monkeypatch):
+        env_file = tmp_path / ".env"
+        env_file.write_text("FLAG=true\n")
+        test_env = Env(source={})
+        test_env.read_env(str(env_file))
+        load = envfiles.load
+        sources = []
+
+        def record_load(*files, environ=None):
+            sources.append(test_env._source)
+            return load(*files, environ=environ)
+
+        monkeypatch.setattr(envfiles, "load", record_load)
+        env_file.write_text("FLAG=false\n")
+        test_env.reload_env()
+
+        # Lookups made while the files are read still see the old values
+        assert [source.get("FLAG") for source in sources] == ["true"]
+        assert test_env("FLAG") == "false"
+
+
+class TestSettingsPrefork:
+    @pytest.fixture
+    def settings_module(self, monkeypatch):
+        monkeypatch.setenv("DJANGO_SECRET_KEY", "secret")
+        monkeypatch.setenv("DJANGO_ALLOWED_HOSTS", "www.test.com")
+
+        class TestSettings(Settings):
+            SECRET_KEY = env()
+            ALLOWED_HOSTS = env.list()
+            ADMINS = [("Admin", "admin@test.com")]
+            CACHES = {
+                "default": {"OPTIONS": {"servers": ["a", "b"], "PASSWORD": "secret"}}
+            }
+            DATABASES = {"default": {"NAME": "test"}}
+
+            class Meta:
+                lazy = True
+
+        name = "prefork_test_settings:TestSettings"
+        module = SettingsModule(name, TestSettings())
+        monkeypatch.setitem(sys.modules, name, module)
+        return module
+
+    def test_freeze(self, settings_module):
+        from django.conf import global_settings
+
+        module = settings_module
+        converted = freeze(module.__name__, gc_freeze=False)
+
+        assert {"ADMINS", "ALLOWED_HOSTS", "CACHES", "LANGUAGES"} <= set(converted)
+        assert module.ADMINS == (("Admin", "admin@test.com"),)
+        assert module.ALLOWED_HOSTS == ("www.test.com",)
+        assert module.CACHES["default"]["OPTIONS"]["servers"] == ("a", "b")
+        with pytest.raises(TypeError):
+            module.CACHES["default"]["OPTIONS"] = {}
+        assert type(module.LANGUAGES) is tuple
+        assert type(global_settings.LANGUAGES) is list
+        # Mutated in place by Django
+        assert "DATABASES" not in converted
+        assert module.DATABASES == {"default": {"NAME": "test"}}
+        assert type(module.DATABASES) is dict
+
+    def test_freeze_cleanse(self, settings_module, monkeypatch):
+        from django.conf import LazySettings
+        from django.views.debug import SafeExceptionReporterFilter
+
+        module = settings_module
+        settings = LazySettings()
+        settings.configure(module)
+        monkeypatch.setattr("django.views.debug.settings", settings)
+        freeze(module.__name__, gc_freeze=False)
+        cleansed = SafeExceptionReporterFilter().cleanse_setting(
+            "CACHES", module.CACHES
+        )
+
+        assert isinstance(module.CACHES, dict)
+        assert cleansed["default"]["OPTIONS"]["PASSWORD"] != "secret"
+        assert copy.deepcopy(module.CACHES) == module.CACHES
+
+    def test_freeze_detach(self, settings_module):
+        module = settings_module
+        settings_cls = type(module.SETTINGS_CLASS)
+        freeze(module.__name__, gc_freeze=False)
+
+        assert vars(settings_cls)["SECRET_KEY"]._deferred is None
+        assert settings_cls.get_dependencies()["SECRET_KEY"] == {"DJANGO_SECRET_KEY"}
+        with pytest.raises(ValueError):
+            module.SETTINGS_CLASS.recompute({"DJANGO_SECRET_KEY"})
+
+    @pytest.mark.skipif(not hasattr(gc, "freeze"), reason="gc.freeze is 3.7+")
+    def test_gc_freeze(self, settings_module):
+        try:
+            freeze(settings_module.__name__)
+            assert gc.get_freeze_count() > 0
+        finally:
+            gc.unfreeze()
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="-X importtime is 3.7+")
+class TestSettingsImportTime:
+    # The time class_settings's own modules may take to import, relative to
+    # the time importing django takes on the same machine
+    budget = 1.5
+    # Modules only needed off the common paths, such as parsing the source
+    deferred = [
+        "ast",
+        "tokenize",
+        "inspect",
+        "concurrent.futures",
+        "django.conf",
+        "class_settings.settings",
+    ]
+
+    def get_import_times(self, statement):
+        environ = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", statement],
+            stderr=subprocess.PIPE,
+            env=environ,
+            universal_newlines=True,
+            check=True,
+        )
+        times = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_time, _, name = line[len("import time:") :].split("|")
+            times[name.strip()] = int(self_time)
+        return times
+
+    def test_deferred(self):
+        times = self.get_import_times("import class_settings")
+
+        assert "class_settings.env" in times
+        assert not set(self.deferred) & times.keys()
+
+    def test_budget(self):
+        totals = []
+        baselines = []
+        for _ in range(3):
+            times = self.get_import_times("import class_settings")
+            totals.append(
+                sum(
+                    time
+                    for name, time in times.items()
+                    if name.split(".")[0] == "class_settings"
+                )
+            )
+            baselines.append(sum(self.get_import_times("import django").values()))
+
+        assert min(totals) < self.budget * min(baselines)